@@ -6,14 +6,60 @@ import discord
 from discord import app_commands
 from discord.ext import commands
 import asyncio
+import hashlib
 import json
 import os
-from modules.config import DISCORD_TOKEN, CHANNEL_ID, CHRISTMAS_TREE_EMOJI
-from modules.gift_manager import GiftManager
+import sys
+import time
+from modules.config import DISCORD_TOKEN, CHANNEL_ID, CHRISTMAS_TREE_EMOJI, CHRISTMAS_ROLE_NAME
+from modules.gift_manager import GiftManager, GiftButton
+from modules.books import BookManager
+from modules.state_store import StateStore, STOCK_ROLES, STOCK_BOOKS
+from modules.lottery import LotteryManager
+from modules.fun_facts import reload_fun_facts
+from modules.leaderboard import Leaderboard
+from modules.settings import SettingsManager
+from modules.log_dispatcher import LogDispatcher
+from modules.roles import RoleCache
+from modules.throttle import ClickThrottle
+from modules.embeds import EmbedRenderer, STYLE_SLASH, STYLE_PREFIX
+from modules.scheduler import DeadlineScheduler
+from modules.reaper import MessageReaper
+from modules.journal import ClaimJournal
+from modules.activity import ChannelActivity
+from modules.persistence import atomic_write_json, load_json
+from modules.metrics import MetricsServer, instrument_http
+from modules.api_scheduler import ApiScheduler
 import modules.config as config
 
+# Empreinte des commandes slash lors de la dernière synchronisation globale
+COMMAND_SYNC_FILE = os.path.join(os.path.dirname(__file__), "data", config.process_file_name("command_sync.json"))
 
-class ChristmasBot(commands.Bot):
+
+def _resident_memory_mb() -> str:
+    """Mémoire résidente du processus, en Mo (Linux), ou pic mémoire sinon"""
+    try:
+        with open('/proc/self/status', 'r') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return f"{int(line.split()[1]) / 1024:.1f} Mo"
+    except OSError:
+        pass
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss est en octets sur macOS, en Ko ailleurs
+        divisor = 1024 * 1024 if sys.platform == 'darwin' else 1024
+        return f"{peak / divisor:.1f} Mo (pic)"
+    except ImportError:
+        return "inconnue"
+
+
+# Mode multi-shards optionnel pour les déploiements sur de nombreux serveurs
+BotBase = commands.AutoShardedBot if config.AUTO_SHARD else commands.Bot
+
+
+class ChristmasBot(BotBase):
     """Bot Discord pour le jeu de cadeaux de Noël"""
     
     def __init__(self):
@@ -22,14 +68,45 @@ class ChristmasBot(commands.Bot):
         intents.message_content = True
         intents.members = True
         
+        # Mode cache léger : pas de découpage des membres au démarrage et
+        # aucun membre gardé en cache (ils sont récupérés à la demande)
+        cache_options = {}
+        if config.LEAN_CACHE:
+            cache_options['chunk_guilds_at_startup'] = False
+            cache_options['member_cache_flags'] = discord.MemberCacheFlags.none()
+        
+        # Plusieurs processus : chacun gère une partie des shards (le stock est
+        # partagé par la base d'état commune, voir STATE_DB_PATH)
+        if config.AUTO_SHARD and config.SHARD_IDS:
+            cache_options['shard_ids'] = config.SHARD_IDS
+            cache_options['shard_count'] = config.SHARD_COUNT
+        
         super().__init__(
             command_prefix='*',
             intents=intents,
             help_command=None,
-            application_id=None  # Désactive l'installation en tant qu'application utilisateur
+            application_id=None,  # Désactive l'installation en tant qu'application utilisateur
+            **cache_options
         )
         
-        self.gift_manager = None
+        self._started_at = time.perf_counter()
+        self._startup_reported = False
+        self.gift_managers = {}  # Une partie par serveur, créée à la demande
+        self.scheduler = None
+        self.reaper = None
+        self.journal = None
+        self.store = None
+        self.book_manager = None
+        self.settings = None
+        self.leaderboard = None
+        self.lottery = None
+        self.log_dispatcher = None
+        self.metrics_server = None
+        self.api_scheduler = None
+        self.role_cache = RoleCache()
+        self.click_throttle = ClickThrottle()
+        self.channel_activity = ChannelActivity()
+        self.embeds = EmbedRenderer(self)
         self.admin_whitelist = self._load_admin_whitelist()
         
     def _load_admin_whitelist(self):
@@ -47,17 +124,133 @@ class ChristmasBot(commands.Bot):
     def is_whitelisted_admin(self, user_id: int) -> bool:
         """Vérifie si l'utilisateur est dans la whitelist admin"""
         return user_id in self.admin_whitelist
+    
+    def get_gift_manager(self, guild: discord.Guild) -> GiftManager:
+        """Retourne la partie du serveur (créée à la première utilisation)"""
+        return self.get_gift_manager_by_id(guild.id)
+    
+    def get_gift_manager_by_id(self, guild_id: int) -> GiftManager:
+        """Retourne la partie d'un serveur à partir de son ID"""
+        gift_manager = self.gift_managers.get(guild_id)
+        if gift_manager is None:
+            gift_manager = GiftManager(self, guild_id)
+            self.gift_managers[guild_id] = gift_manager
+        return gift_manager
+    
+    async def resolve_member(self, guild: discord.Guild, user_id: int) -> discord.Member:
+        """Retourne un membre depuis le cache, ou le récupère auprès de Discord"""
+        member = guild.get_member(user_id)
+        if member is None:
+            member = await guild.fetch_member(user_id)
+        return member
         
     async def setup_hook(self):
         """Configuration initiale du bot"""
         print("Configuration du bot...")
-        self.gift_manager = GiftManager(self)
+        self.scheduler = DeadlineScheduler()
         
-        # Synchroniser les commandes slash globalement
+        # Métriques optionnelles (durée des appels à l'API par route)
+        if config.METRICS_PORT:
+            instrument_http(self.http)
+            self.metrics_server = MetricsServer(config.METRICS_PORT, config.METRICS_HOST)
+            await self.metrics_server.start()
+        
+        # File à priorités devant les appels à l'API (installée après les métriques :
+        # la durée mesurée par route n'inclut pas l'attente dans la file)
+        self.api_scheduler = ApiScheduler()
+        self.api_scheduler.install(self.http)
+        
+        # Suppressions de messages planifiées (reprises après un redémarrage)
+        self.reaper = MessageReaper(self.http)
+        await self.reaper.start()
+        
+        # Journal des cadeaux : compteurs repris depuis l'instantané et la fin du journal
+        self.journal = ClaimJournal()
+        await self.journal.open()
+        
+        # Base d'état : stock, gagnants et historique
+        self.store = StateStore()
+        await self.store.open()
+        self.book_manager = BookManager(self.store)
+        await self.book_manager.load()  # Chargé une seule fois
+        self.settings = SettingsManager(self.store)
+        await self.settings.load()  # Paramètres modifiés par /config sur chaque serveur
+        self.leaderboard = Leaderboard(self.store)
+        
+        # Boutons des cadeaux : un seul gestionnaire, routé par custom_id
+        self.add_dynamic_items(GiftButton)
+        await self._restore_gifts()
+        
+        self.log_dispatcher = LogDispatcher(self)
+        self.log_dispatcher.start()
+        self.lottery = LotteryManager(self)
+        
+        # Synchroniser les commandes slash globalement (seulement si elles ont changé)
         # Note: Peut prendre jusqu'à 1h pour se propager
-        # Pour sync instantané sur un serveur spécifique, voir on_ready
+        # Pour sync instantané sur un serveur spécifique, voir *sync
+        await self._sync_commands_if_changed()
+        
+    async def _restore_gifts(self):
+        """Réactive les cadeaux encore affichés lors du dernier arrêt"""
+        # Base partagée entre processus : seuls les cadeaux des serveurs de nos shards
+        rows = [row for row in await self.store.get_active_gifts() if self.owns_guild(row[1])]
+        for gift_id, guild_id, channel_id, message_id, expires_at in rows:
+            channel = self.get_partial_messageable(channel_id, guild_id=guild_id)
+            self.get_gift_manager_by_id(guild_id).restore_gift(gift_id, channel, message_id, expires_at)
+        if rows:
+            print(f"{len(rows)} cadeau(x) encore affiché(s) réactivé(s)")
+        
+    def owns_guild(self, guild_id: int) -> bool:
+        """Vérifie si le serveur est sur un shard géré par ce processus"""
+        if not (config.AUTO_SHARD and config.SHARD_IDS):
+            return True
+        # Règle de répartition de Discord : (guild_id >> 22) % nombre de shards
+        return (guild_id >> 22) % config.SHARD_COUNT in config.SHARD_IDS
+        
+    def _command_tree_fingerprint(self) -> str:
+        """Empreinte stable des commandes slash telles qu'envoyées à Discord"""
+        payload = [command.to_dict(self.tree) for command in self.tree.get_commands()]
+        payload.sort(key=lambda data: (data.get('type', 1), data['name']))
+        
+        data = json.dumps(
+            {'application_id': self.application_id, 'commands': payload},
+            sort_keys=True,
+            separators=(',', ':'),
+            default=str
+        )
+        return hashlib.sha256(data.encode('utf-8')).hexdigest()
+    
+    async def _sync_commands_if_changed(self):
+        """Synchronise les commandes slash si leur empreinte a changé depuis la dernière fois"""
+        fingerprint = self._command_tree_fingerprint()
+        previous = load_json(COMMAND_SYNC_FILE, {}).get('fingerprint')
+        
+        if fingerprint == previous and not config.FORCE_COMMAND_SYNC:
+            print(f"Commandes slash inchangées ({fingerprint[:12]}), synchronisation ignorée.")
+            return
+        
+        reason = "forcée" if config.FORCE_COMMAND_SYNC else "commandes modifiées"
         await self.tree.sync()
-        print("Commandes slash synchronisées !")
+        atomic_write_json(COMMAND_SYNC_FILE, {'fingerprint': fingerprint})
+        print(f"Commandes slash synchronisées ({reason}, {fingerprint[:12]}) !")
+        
+    async def close(self):
+        """Arrête proprement les tâches du bot avant la déconnexion"""
+        if self.scheduler is not None:
+            self.scheduler.close()
+        if self.api_scheduler is not None:
+            self.api_scheduler.close()
+        if self.log_dispatcher is not None:
+            await self.log_dispatcher.close()
+        if self.reaper is not None:
+            await self.reaper.close()
+        if self.journal is not None:
+            await self.journal.close()
+        if self.store is not None:
+            await self.store.close()
+        if self.metrics_server is not None:
+            await self.metrics_server.close()
+        await super().close()
         
     async def on_ready(self):
         """Appelé quand le bot est prêt"""
@@ -65,11 +258,45 @@ class ChristmasBot(commands.Bot):
         print(f'ID: {self.user.id}')
         print('------')
         
+        # Mesures de démarrage (une seule fois, pas aux reconnexions)
+        if not self._startup_reported:
+            self._startup_reported = True
+            mode = "léger" if config.LEAN_CACHE else "complet"
+            print(f"⏱️ Prêt en {time.perf_counter() - self._started_at:.1f}s "
+                  f"(mémoire résidente : {_resident_memory_mb()}, cache des membres : {mode})")
+        
+        # Préremplir le cache du rôle de Noël
+        self.role_cache.warm(self.guilds)
+        
         # Définir le statut du bot
         await self.change_presence(
             activity=discord.Game(name="🎁 Jeu de cadeaux de Noël (*info)")
         )
     
+    async def on_guild_remove(self, guild: discord.Guild):
+        """Arrête et oublie la partie d'un serveur quitté"""
+        gift_manager = self.gift_managers.pop(guild.id, None)
+        if gift_manager is not None and gift_manager.is_running:
+            gift_manager.stop_spawn_loop()
+        
+    async def on_message(self, message: discord.Message):
+        """Mesure l'activité des salons puis traite les commandes préfixe"""
+        if message.guild is not None and not message.author.bot:
+            self.channel_activity.record(message.channel.id)
+        await self.process_commands(message)
+        
+    async def on_guild_channel_delete(self, channel):
+        """Oublie l'activité d'un salon supprimé"""
+        self.channel_activity.forget(channel.id)
+        
+    async def on_guild_role_update(self, before: discord.Role, after: discord.Role):
+        """Met à jour le cache du rôle de Noël lorsqu'un rôle est modifié"""
+        self.role_cache.on_role_update(before, after)
+        
+    async def on_guild_role_delete(self, role: discord.Role):
+        """Retire du cache le rôle de Noël s'il est supprimé"""
+        self.role_cache.invalidate(role)
+    
     async def on_command_error(self, ctx, error):
         """Gère les erreurs de commandes"""
         if isinstance(error, commands.CommandNotFound):
@@ -97,7 +324,8 @@ bot = ChristmasBot()
 @app_commands.describe(channels="Canaux où faire apparaître les cadeaux (séparés par des espaces)")
 async def slash_start(interaction: discord.Interaction, channels: str = None):
     """Démarre le jeu de cadeaux de Noël"""
-    if bot.gift_manager.is_running:
+    gift_manager = bot.get_gift_manager(interaction.guild)
+    if gift_manager.is_running:
         await interaction.response.send_message("🎄 Le jeu est déjà en cours !", ephemeral=True)
         return
     
@@ -114,11 +342,11 @@ async def slash_start(interaction: discord.Interaction, channels: str = None):
     
     # Si aucun canal spécifié, utiliser le canal configuré ou actuel
     if not target_channels:
-        default_ch = bot.get_channel(CHANNEL_ID) or interaction.channel
+        default_ch = interaction.guild.get_channel(CHANNEL_ID) or interaction.channel
         target_channels = [default_ch]
     
     # Démarrer la boucle d'apparition des cadeaux
-    bot.loop.create_task(bot.gift_manager.start_spawn_loop(target_channels))
+    gift_manager.start_spawn_loop(target_channels)
     
     channels_mention = ", ".join([ch.mention for ch in target_channels])
     embed = discord.Embed(
@@ -136,11 +364,12 @@ async def slash_start(interaction: discord.Interaction, channels: str = None):
 @app_commands.default_permissions(administrator=True)
 async def slash_stop(interaction: discord.Interaction):
     """Arrête le jeu de cadeaux de Noël"""
-    if not bot.gift_manager.is_running:
+    gift_manager = bot.get_gift_manager(interaction.guild)
+    if not gift_manager.is_running:
         await interaction.response.send_message("🎄 Le jeu n'est pas en cours.", ephemeral=True)
         return
     
-    bot.gift_manager.stop_spawn_loop()
+    gift_manager.stop_spawn_loop()
     
     embed = discord.Embed(
         title=f"{CHRISTMAS_TREE_EMOJI} Jeu de Noël arrêté",
@@ -155,11 +384,10 @@ async def slash_stop(interaction: discord.Interaction):
 @app_commands.default_permissions(administrator=True)
 async def slash_reset(interaction: discord.Interaction):
     """Remet à zéro les compteurs de récompenses distribuées"""
-    old_roles = config.ROLES_GIVEN
-    old_books = config.BOOKS_GIVEN
-    
-    config.ROLES_GIVEN = 0
-    config.BOOKS_GIVEN = 0
+    old_stock = await bot.store.reset_stock(interaction.guild_id)
+    config.bump_state_version(interaction.guild_id)
+    old_roles = old_stock[STOCK_ROLES]
+    old_books = old_stock[STOCK_BOOKS]
     
     embed = discord.Embed(
         title="🔄 Compteurs réinitialisés",
@@ -176,8 +404,9 @@ async def slash_reset(interaction: discord.Interaction):
     await interaction.response.send_message(embed=embed)
 
 
-@bot.tree.command(name="config", description="Configure les paramètres du jeu")
+@bot.tree.command(name="config", description="Configure les paramètres du jeu sur ce serveur")
 @app_commands.default_permissions(administrator=True)
+@app_commands.guild_only()
 @app_commands.describe(
     gift_lifetime="Durée de vie d'un cadeau en secondes",
     min_interval="Intervalle minimum entre cadeaux (secondes)",
@@ -199,95 +428,75 @@ async def slash_config(
     max_roles: int = None,
     max_books: int = None
 ):
-    """Configure les paramètres du jeu"""
+    """Configure les paramètres du jeu (propres à chaque serveur)"""
+    settings = bot.settings.get(interaction.guild_id)
+    values = {}  # Paramètres modifiés, enregistrés ensemble après validation
     changes = []
     
     if gift_lifetime is not None:
         if gift_lifetime < 1 or gift_lifetime > 60:
             await interaction.response.send_message("❌ La durée de vie doit être entre 1 et 60 secondes.", ephemeral=True)
             return
-        config.GIFT_LIFETIME = gift_lifetime
+        values['gift_lifetime'] = gift_lifetime
         changes.append(f"• Durée de vie des cadeaux: **{gift_lifetime}s**")
     
     if min_interval is not None:
         if min_interval < 1:
             await interaction.response.send_message("❌ L'intervalle minimum doit être au moins 1 seconde.", ephemeral=True)
             return
-        config.MIN_SPAWN_INTERVAL = min_interval
+        values['min_spawn_interval'] = min_interval
         changes.append(f"• Intervalle minimum: **{min_interval}s** ({min_interval//60} min)")
     
     if max_interval is not None:
-        if max_interval < config.MIN_SPAWN_INTERVAL:
+        if max_interval < values.get('min_spawn_interval', settings.min_spawn_interval):
             await interaction.response.send_message("❌ L'intervalle maximum doit être supérieur au minimum.", ephemeral=True)
             return
-        config.MAX_SPAWN_INTERVAL = max_interval
+        values['max_spawn_interval'] = max_interval
         changes.append(f"• Intervalle maximum: **{max_interval}s** ({max_interval//60} min)")
+    elif min_interval is not None and min_interval > settings.max_spawn_interval:
+        await interaction.response.send_message("❌ L'intervalle minimum doit être inférieur au maximum.", ephemeral=True)
+        return
     
     if role_probability is not None:
         if role_probability < 0 or role_probability > 1:
             await interaction.response.send_message("❌ La probabilité doit être entre 0.0 et 1.0.", ephemeral=True)
             return
-        config.ROLE_PROBABILITY = role_probability
+        values['role_probability'] = role_probability
         changes.append(f"• Probabilité de gagner le rôle: **{role_probability*100:.1f}%**")
     
     if book_probability is not None:
         if book_probability < 0 or book_probability > 1:
             await interaction.response.send_message("❌ La probabilité doit être entre 0.0 et 1.0.", ephemeral=True)
             return
-        config.BOOK_PROBABILITY = book_probability
+        values['book_probability'] = book_probability
         changes.append(f"• Probabilité de gagner le livre: **{book_probability*100:.1f}%**")
     
     if log_channel is not None:
-        config.LOG_CHANNEL_ID = log_channel.id
+        values['log_channel_id'] = log_channel.id
         changes.append(f"• Canal de logs: {log_channel.mention}")
     
     if max_roles is not None:
         if max_roles < -1:
             await interaction.response.send_message("❌ Le nombre doit être -1 (illimité) ou positif.", ephemeral=True)
             return
-        config.MAX_ROLES = max_roles
+        values['max_roles'] = max_roles
         changes.append(f"• Stock max de rôles: **{'∞' if max_roles == -1 else max_roles}**")
     
     if max_books is not None:
         if max_books < -1:
             await interaction.response.send_message("❌ Le nombre doit être -1 (illimité) ou positif.", ephemeral=True)
             return
-        config.MAX_BOOKS = max_books
+        values['max_books'] = max_books
         changes.append(f"• Stock max de livres: **{'∞' if max_books == -1 else max_books}**")
     
     if not changes:
         # Afficher la configuration actuelle
-        embed = discord.Embed(
-            title="⚙️ Configuration actuelle",
-            color=0x3498db
-        )
-        
-        log_ch = interaction.guild.get_channel(config.LOG_CHANNEL_ID) if config.LOG_CHANNEL_ID else None
-        
-        roles_remaining = config.MAX_ROLES - config.ROLES_GIVEN if config.MAX_ROLES != -1 else "∞"
-        books_remaining = config.MAX_BOOKS - config.BOOKS_GIVEN if config.MAX_BOOKS != -1 else "∞"
-        
-        embed.add_field(
-            name="Paramètres du jeu",
-            value=f"• Durée de vie des cadeaux: **{config.GIFT_LIFETIME}s**\n"
-                  f"• Intervalle minimum: **{config.MIN_SPAWN_INTERVAL}s** ({config.MIN_SPAWN_INTERVAL//60} min)\n"
-                  f"• Intervalle maximum: **{config.MAX_SPAWN_INTERVAL}s** ({config.MAX_SPAWN_INTERVAL//60} min)\n"
-                  f"• Probabilité rôle: **{config.ROLE_PROBABILITY*100:.1f}%**\n"
-                  f"• Probabilité livre: **{config.BOOK_PROBABILITY*100:.1f}%**\n"
-                  f"• Canal de logs: {log_ch.mention if log_ch else '❌ Non configuré'}",
-            inline=False
-        )
-        
-        embed.add_field(
-            name="📊 Stock de récompenses",
-            value=f"🎅 Rôles: **{config.ROLES_GIVEN}** / **{'∞' if config.MAX_ROLES == -1 else config.MAX_ROLES}** (Restant: **{roles_remaining}**)\n"
-                  f"📚 Livres: **{config.BOOKS_GIVEN}** / **{'∞' if config.MAX_BOOKS == -1 else config.MAX_BOOKS}** (Restant: **{books_remaining}**)",
-            inline=False
-        )
-        
+        embed = await bot.embeds.config_overview(interaction.guild)
         await interaction.response.send_message(embed=embed)
     else:
-        # Afficher les changements
+        # Enregistrer les changements (et invalider les embeds en cache)
+        await bot.settings.update(interaction.guild_id, **values)
+        config.bump_state_version(interaction.guild_id)
         embed = discord.Embed(
             title="✅ Configuration mise à jour",
             description="\n".join(changes),
@@ -300,145 +509,34 @@ async def slash_config(
 @app_commands.default_permissions(administrator=True)
 async def slash_gameconfig(interaction: discord.Interaction):
     """Affiche la configuration actuelle du jeu"""
-    embed = discord.Embed(
-        title="⚙️ Configuration du jeu",
-        color=0x3498db
-    )
-    
-    # Paramètres du jeu
-    embed.add_field(
-        name="🎮 Paramètres des cadeaux",
-        value=f"• Durée de vie : **{config.GIFT_LIFETIME}s**\n"
-              f"• Intervalle min : **{config.MIN_SPAWN_INTERVAL}s** ({config.MIN_SPAWN_INTERVAL//60} min)\n"
-              f"• Intervalle max : **{config.MAX_SPAWN_INTERVAL}s** ({config.MAX_SPAWN_INTERVAL//60} min)",
-        inline=False
-    )
-    
-    # Probabilités
-    embed.add_field(
-        name="🎲 Probabilités",
-        value=f"• Rôle : **{config.ROLE_PROBABILITY*100:.1f}%**\n"
-              f"• Livre : **{config.BOOK_PROBABILITY*100:.1f}%**",
-        inline=False
-    )
-    
-    # Stock
-    roles_remaining = config.MAX_ROLES - config.ROLES_GIVEN if config.MAX_ROLES != -1 else "∞"
-    books_remaining = config.MAX_BOOKS - config.BOOKS_GIVEN if config.MAX_BOOKS != -1 else "∞"
-    
-    embed.add_field(
-        name="📊 Stock de récompenses",
-        value=f"🎅 Rôles: **{config.ROLES_GIVEN}** / **{'∞' if config.MAX_ROLES == -1 else config.MAX_ROLES}** (Restant: **{roles_remaining}**)\n"
-              f"📚 Livres: **{config.BOOKS_GIVEN}** / **{'∞' if config.MAX_BOOKS == -1 else config.MAX_BOOKS}** (Restant: **{books_remaining}**)",
-        inline=False
-    )
-    
-    # Canal de logs
-    log_ch = interaction.guild.get_channel(config.LOG_CHANNEL_ID) if config.LOG_CHANNEL_ID else None
-    embed.add_field(
-        name="📝 Canal de logs",
-        value=log_ch.mention if log_ch else "❌ Non configuré",
-        inline=False
-    )
-    
-    # Salons actifs
-    if bot.gift_manager.is_running and bot.gift_manager.channels:
-        channels_mention = ", ".join([ch.mention for ch in bot.gift_manager.channels])
-        embed.add_field(
-            name="📍 Salon(s) actif(s)",
-            value=channels_mention,
-            inline=False
-        )
-    
-    # Statut
-    status = "✅ En cours" if bot.gift_manager.is_running else "❌ Arrêté"
-    embed.add_field(
-        name="🔴 Statut du jeu",
-        value=status,
-        inline=False
-    )
-    
+    embed = await bot.embeds.gameconfig(interaction.guild)
     await interaction.response.send_message(embed=embed, ephemeral=True)
 
 
 @bot.tree.command(name="info", description="Affiche les informations sur le jeu")
 async def slash_info(interaction: discord.Interaction):
     """Affiche les informations sur le jeu"""
-    embed = discord.Embed(
-        title=f"{CHRISTMAS_TREE_EMOJI} Jeu de Cadeaux de Noël",
-        description="Voici comment jouer :",
-        color=0x3498db
-    )
-    
-    embed.add_field(
-        name="🎁 Comment jouer ?",
-        value=f"Des cadeaux apparaissent aléatoirement dans le chat !\n"
-              f"Soyez le premier à cliquer sur le bouton pour tenter votre chance.\n"
-              f"\u26a0️ Attention : les cadeaux disparaissent rapidement s'ils ne sont pas réclamés !",
-        inline=False
-    )
-    
-    # Afficher les salons si le jeu est en cours
-    if bot.gift_manager.is_running and bot.gift_manager.channels:
-        channels_mention = ", ".join([ch.mention for ch in bot.gift_manager.channels])
-        embed.add_field(
-            name="📍 Salon(s) des cadeaux",
-            value=f"Les cadeaux apparaissent dans : {channels_mention}",
-            inline=False
-        )
-    
-    embed.add_field(
-        name="🎯 Récompenses",
-        value=f"• Tentez de gagner un rôle spécial de Noël ! 🎅\n"
-              f"• Ou le livre 'Guide de survie au lycée' ! 📚\n"
-              f"• Ou découvrez un fun fact sur Noël ! 🎄",
-        inline=False
-    )
-    
-    status = "✅ En cours" if bot.gift_manager.is_running else "❌ Arrêté"
-    embed.add_field(
-        name="📊 Statut",
-        value=status,
-        inline=False
-    )
-    
-    embed.add_field(
-        name="🛠️ Commandes admin",
-        value="Utilisez </gameconfig:0> pour voir la configuration complète du jeu",
-        inline=False
-    )
-    
+    await interaction.response.send_message(embed=bot.embeds.info(interaction.guild, STYLE_SLASH))
+
+
+@bot.tree.command(name="stats", description="Affiche l'activité et les cadeaux récupérés par salon")
+@app_commands.default_permissions(administrator=True)
+async def slash_stats(interaction: discord.Interaction):
+    """Affiche l'activité et le taux de récupération des cadeaux par salon"""
+    await interaction.response.send_message(embed=bot.embeds.stats(interaction.guild), ephemeral=True)
+
+
+@bot.tree.command(name="leaderboard", description="Affiche le classement des joueurs")
+async def slash_leaderboard(interaction: discord.Interaction):
+    """Affiche le classement des joueurs du serveur"""
+    embed = await bot.embeds.leaderboard(interaction.guild)
     await interaction.response.send_message(embed=embed)
 
 
 @bot.tree.command(name="help", description="Affiche l'aide des commandes")
 async def slash_help(interaction: discord.Interaction):
     """Affiche l'aide des commandes"""
-    embed = discord.Embed(
-        title=f"{CHRISTMAS_TREE_EMOJI} Commandes du Bot de Noël",
-        description="Liste des commandes disponibles :",
-        color=0x3498db
-    )
-    
-    embed.add_field(
-        name="🎮 Commandes pour tous",
-        value="</info:0> - Affiche les informations sur le jeu\n"
-              "</help:0> - Affiche cette aide",
-        inline=False
-    )
-    
-    embed.add_field(
-        name="🔧 Commandes administrateur",
-        value="</start:0> - Démarre le jeu de cadeaux\n"
-              "</stop:0> - Arrête le jeu de cadeaux\n"
-              "</config:0> - Configure les paramètres du jeu\n"
-              "</gameconfig:0> - Affiche la configuration actuelle\n"
-              "</reset:0> - Réinitialise les compteurs\n\n"
-              "**Ou utilisez le préfixe `*` :** `*start`, `*stop`, `*gameconfig`, `*reset`, `*removerole`, `*sync`",
-        inline=False
-    )
-    
-    await interaction.response.send_message(embed=embed, ephemeral=True)
+    await interaction.response.send_message(embed=bot.embeds.help(STYLE_SLASH), ephemeral=True)
 
 
 # ==================== COMMANDES PRÉFIXE (*) ====================
@@ -455,21 +553,22 @@ async def start_game(ctx, *channels: discord.TextChannel):
         await ctx.send("❌ Vous devez être administrateur pour utiliser cette commande !")
         return
     
-    if bot.gift_manager.is_running:
+    gift_manager = bot.get_gift_manager(ctx.guild)
+    if gift_manager.is_running:
         await ctx.send("🎄 Le jeu est déjà en cours !")
         return
     
     # Si aucun canal spécifié, utiliser le canal configuré ou actuel
     target_channels = list(channels) if channels else []
     if not target_channels:
-        default_ch = bot.get_channel(CHANNEL_ID) if CHANNEL_ID != 0 else ctx.channel
+        default_ch = ctx.guild.get_channel(CHANNEL_ID) or ctx.channel
         if default_ch is None:
             await ctx.send("❌ Canal introuvable ! Vérifiez la configuration.")
             return
         target_channels = [default_ch]
     
     # Démarrer la boucle d'apparition des cadeaux
-    bot.loop.create_task(bot.gift_manager.start_spawn_loop(target_channels))
+    gift_manager.start_spawn_loop(target_channels)
     
     channels_mention = ", ".join([ch.mention for ch in target_channels])
     embed = discord.Embed(
@@ -494,11 +593,10 @@ async def reset_counters(ctx):
         await ctx.send("❌ Vous devez être administrateur pour utiliser cette commande !")
         return
     
-    old_roles = config.ROLES_GIVEN
-    old_books = config.BOOKS_GIVEN
-    
-    config.ROLES_GIVEN = 0
-    config.BOOKS_GIVEN = 0
+    old_stock = await bot.store.reset_stock(ctx.guild.id)
+    config.bump_state_version(ctx.guild.id)
+    old_roles = old_stock[STOCK_ROLES]
+    old_books = old_stock[STOCK_BOOKS]
     
     embed = discord.Embed(
         title="🔄 Compteurs réinitialisés",
@@ -526,11 +624,12 @@ async def stop_game(ctx):
         await ctx.send("❌ Vous devez être administrateur pour utiliser cette commande !")
         return
     
-    if not bot.gift_manager.is_running:
+    gift_manager = bot.get_gift_manager(ctx.guild)
+    if not gift_manager.is_running:
         await ctx.send("🎄 Le jeu n'est pas en cours.")
         return
         
-    bot.gift_manager.stop_spawn_loop()
+    gift_manager.stop_spawn_loop()
     
     embed = discord.Embed(
         title=f"{CHRISTMAS_TREE_EMOJI} Jeu de Noël arrêté",
@@ -544,50 +643,26 @@ async def stop_game(ctx):
 @bot.command(name='info')
 async def game_info(ctx):
     """Affiche les informations sur le jeu"""
-    embed = discord.Embed(
-        title=f"{CHRISTMAS_TREE_EMOJI} Jeu de Cadeaux de Noël",
-        description="Voici comment jouer :",
-        color=0x3498db
-    )
-    
-    embed.add_field(
-        name="🎁 Comment jouer ?",
-        value=f"Des cadeaux apparaissent aléatoirement dans le chat !\n"
-              f"Soyez le premier à cliquer sur le bouton pour tenter votre chance.\n"
-              f"\u26a0️ Attention : les cadeaux disparaissent rapidement s'ils ne sont pas réclamés !",
-        inline=False
-    )
-    
-    # Afficher les salons si le jeu est en cours
-    if bot.gift_manager.is_running and bot.gift_manager.channels:
-        channels_mention = ", ".join([ch.mention for ch in bot.gift_manager.channels])
-        embed.add_field(
-            name="📍 Salon(s) des cadeaux",
-            value=f"Les cadeaux apparaissent dans : {channels_mention}",
-            inline=False
-        )
-    
-    embed.add_field(
-        name="🎯 Récompenses",
-        value=f"• Tentez de gagner un rôle spécial de Noël ! 🎅\n"
-              f"• Ou le livre 'Guide de survie au lycée' ! 📚\n"
-              f"• Ou découvrez un fun fact sur Noël ! 🎄",
-        inline=False
-    )
-    
-    status = "✅ En cours" if bot.gift_manager.is_running else "❌ Arrêté"
-    embed.add_field(
-        name="📊 Statut",
-        value=status,
-        inline=False
-    )
-    
-    embed.add_field(
-        name="🛠️ Commandes admin",
-        value="Utilisez `*gameconfig` pour voir la configuration complète du jeu",
-        inline=False
-    )
+    await ctx.send(embed=bot.embeds.info(ctx.guild, STYLE_PREFIX))
+
+
+@bot.command(name='stats')
+async def stats_command(ctx):
+    """
+    Affiche l'activité et le taux de récupération des cadeaux par salon
+    Commande réservée aux administrateurs ou utilisateurs autorisés
+    """
+    if not (ctx.author.guild_permissions.administrator or bot.is_whitelisted_admin(ctx.author.id)):
+        await ctx.send("❌ Vous devez être administrateur pour utiliser cette commande !")
+        return
     
+    await ctx.send(embed=bot.embeds.stats(ctx.guild))
+
+
+@bot.command(name='leaderboard')
+async def leaderboard_command(ctx):
+    """Affiche le classement des joueurs du serveur"""
+    embed = await bot.embeds.leaderboard(ctx.guild)
     await ctx.send(embed=embed)
 
 
@@ -602,96 +677,14 @@ async def gameconfig_command(ctx):
         await ctx.send("❌ Vous devez être administrateur pour utiliser cette commande !")
         return
     
-    embed = discord.Embed(
-        title="⚙️ Configuration du jeu",
-        color=0x3498db
-    )
-    
-    # Paramètres du jeu
-    embed.add_field(
-        name="🎮 Paramètres des cadeaux",
-        value=f"• Durée de vie : **{config.GIFT_LIFETIME}s**\n"
-              f"• Intervalle min : **{config.MIN_SPAWN_INTERVAL}s** ({config.MIN_SPAWN_INTERVAL//60} min)\n"
-              f"• Intervalle max : **{config.MAX_SPAWN_INTERVAL}s** ({config.MAX_SPAWN_INTERVAL//60} min)",
-        inline=False
-    )
-    
-    # Probabilités
-    embed.add_field(
-        name="🎲 Probabilités",
-        value=f"• Rôle : **{config.ROLE_PROBABILITY*100:.1f}%**\n"
-              f"• Livre : **{config.BOOK_PROBABILITY*100:.1f}%**",
-        inline=False
-    )
-    
-    # Stock
-    roles_remaining = config.MAX_ROLES - config.ROLES_GIVEN if config.MAX_ROLES != -1 else "∞"
-    books_remaining = config.MAX_BOOKS - config.BOOKS_GIVEN if config.MAX_BOOKS != -1 else "∞"
-    
-    embed.add_field(
-        name="📊 Stock de récompenses",
-        value=f"🎅 Rôles: **{config.ROLES_GIVEN}** / **{'∞' if config.MAX_ROLES == -1 else config.MAX_ROLES}** (Restant: **{roles_remaining}**)\n"
-              f"📚 Livres: **{config.BOOKS_GIVEN}** / **{'∞' if config.MAX_BOOKS == -1 else config.MAX_BOOKS}** (Restant: **{books_remaining}**)",
-        inline=False
-    )
-    
-    # Canal de logs
-    log_ch = ctx.guild.get_channel(config.LOG_CHANNEL_ID) if config.LOG_CHANNEL_ID else None
-    embed.add_field(
-        name="📝 Canal de logs",
-        value=log_ch.mention if log_ch else "❌ Non configuré",
-        inline=False
-    )
-    
-    # Salons actifs
-    if bot.gift_manager.is_running and bot.gift_manager.channels:
-        channels_mention = ", ".join([ch.mention for ch in bot.gift_manager.channels])
-        embed.add_field(
-            name="📍 Salon(s) actif(s)",
-            value=channels_mention,
-            inline=False
-        )
-    
-    # Statut
-    status = "✅ En cours" if bot.gift_manager.is_running else "❌ Arrêté"
-    embed.add_field(
-        name="🔴 Statut du jeu",
-        value=status,
-        inline=False
-    )
-    
+    embed = await bot.embeds.gameconfig(ctx.guild)
     await ctx.send(embed=embed)
 
 
 @bot.command(name='help')
 async def help_command(ctx):
     """Affiche l'aide des commandes"""
-    embed = discord.Embed(
-        title=f"{CHRISTMAS_TREE_EMOJI} Commandes du Bot de Noël",
-        description="Utilisez les commandes slash `/` ou préfixe `*`",
-        color=0x3498db
-    )
-    
-    embed.add_field(
-        name="🎮 Pour tous",
-        value="`/info` ou `*info` - Informations sur le jeu\n"
-              "`/help` ou `*help` - Cette aide",
-        inline=False
-    )
-    
-    embed.add_field(
-        name="🔧 Admin uniquement",
-        value="`/start` ou `*start` - Démarrer le jeu\n"
-              "`/stop` ou `*stop` - Arrêter le jeu\n"
-              "`/config` - Configurer le jeu\n"
-              "`/gameconfig` ou `*gameconfig` - Voir la configuration\n"
-              "`/reset` ou `*reset` - Réinitialiser les compteurs\n"
-              "`*removerole @membre` - Retirer le rôle de Noël\n"
-              "`*sync` - Synchroniser les commandes slash",
-        inline=False
-    )
-    
-    await ctx.send(embed=embed)
+    await ctx.send(embed=bot.embeds.help(STYLE_PREFIX))
 
 
 @bot.command(name='removerole')
@@ -706,10 +699,10 @@ async def remove_role_command(ctx, member: discord.Member):
         return
     
     # Chercher le rôle
-    role = discord.utils.get(ctx.guild.roles, name="🎅 Elfe de Noël 2025")
+    role = bot.role_cache.get(ctx.guild)
     
     if role is None:
-        await ctx.send("❌ Le rôle 'Elfe de Noël 2025' n'existe pas sur ce serveur.")
+        await ctx.send(f"❌ Le rôle '{CHRISTMAS_ROLE_NAME}' n'existe pas sur ce serveur.")
         return
     
     if role not in member.roles:
@@ -725,6 +718,30 @@ async def remove_role_command(ctx, member: discord.Member):
         await ctx.send(f"❌ Erreur : {e}")
 
 
+@bot.command(name='reloadbooks')
+async def reload_books_command(ctx):
+    """Recharge la liste des gagnants du livre depuis le disque"""
+    # Vérifier si l'utilisateur est admin du serveur OU dans la whitelist
+    if not (ctx.author.guild_permissions.administrator or bot.is_whitelisted_admin(ctx.author.id)):
+        await ctx.send("❌ Vous devez être administrateur pour utiliser cette commande !")
+        return
+    
+    count = await bot.book_manager.reload()
+    await ctx.send(f"✅ Liste des gagnants du livre rechargée ({count} gagnant(s)).")
+
+
+@bot.command(name='reloadfacts')
+async def reload_facts_command(ctx):
+    """Relit les paquets de fun facts depuis le disque"""
+    # Vérifier si l'utilisateur est admin du serveur OU dans la whitelist
+    if not (ctx.author.guild_permissions.administrator or bot.is_whitelisted_admin(ctx.author.id)):
+        await ctx.send("❌ Vous devez être administrateur pour utiliser cette commande !")
+        return
+    
+    reload_fun_facts()
+    await ctx.send("✅ Paquets de fun facts rechargés.")
+
+
 @bot.command(name='sync')
 async def sync_commands(ctx):
     """Synchronise les commandes slash avec le serveur"""
@@ -777,6 +794,14 @@ def main():
         print("❌ ERREUR : Le token Discord n'est pas configuré !")
         print("Veuillez créer un fichier .env avec votre DISCORD_TOKEN")
         return
+    
+    # Répartition sur plusieurs processus : chaque processus doit connaître le nombre total de shards
+    if config.SHARD_IDS and config.SHARD_COUNT is None:
+        print("❌ ERREUR : SHARD_IDS nécessite SHARD_COUNT (nombre total de shards, identique dans tous les processus)")
+        return
+    if any(shard_id < 0 or shard_id >= (config.SHARD_COUNT or 1) for shard_id in config.SHARD_IDS):
+        print(f"❌ ERREUR : SHARD_IDS doit contenir des numéros de shard entre 0 et SHARD_COUNT - 1 ({config.SHARD_COUNT} shards)")
+        return
         
     try:
         bot.run(DISCORD_TOKEN)
@@ -0,0 +1,103 @@
+"""
+Module de mesure de l'activité des salons (messages par minute)
+
+Chaque salon a un compteur à fenêtre glissante découpé en tranches : un
+message coûte une incrémentation, et la mémoire par salon est fixe. Les
+apparitions de cadeaux sont pondérées par cette activité : les salons
+actifs reçoivent plus de cadeaux, plus souvent.
+"""
+
+import random
+import time
+import modules.config as config
+
+
+class _SlidingCounter:
+    """Compteur sur une fenêtre glissante, découpée en tranches de durée fixe"""
+
+    __slots__ = ('counts', 'last_slot')
+
+    def __init__(self, slots: int):
+        self.counts = [0] * slots
+        self.last_slot = 0  # Numéro de la dernière tranche mise à jour
+
+    def advance(self, slot: int):
+        """Remet à zéro les tranches sorties de la fenêtre depuis la dernière mise à jour"""
+        elapsed = slot - self.last_slot
+        if elapsed <= 0:
+            return
+        size = len(self.counts)
+        if elapsed >= size:
+            self.counts = [0] * size
+        else:
+            for step in range(1, elapsed + 1):
+                self.counts[(self.last_slot + step) % size] = 0
+        self.last_slot = slot
+
+
+class ChannelActivity:
+    """Messages par salon sur les ACTIVITY_WINDOW dernières secondes"""
+
+    def __init__(self, window: float = None, slots: int = None):
+        """
+        Args:
+            window: Durée de la fenêtre (secondes)
+            slots: Nombre de tranches de la fenêtre (précision du glissement)
+        """
+        self.window = window or config.ACTIVITY_WINDOW
+        self.slots = slots or config.ACTIVITY_SLOTS
+        self._slot_width = self.window / self.slots
+        self._counters = {}  # ID du salon -> _SlidingCounter
+
+    def _slot(self, now: float) -> int:
+        return int(now / self._slot_width)
+
+    def record(self, channel_id: int, now: float = None):
+        """Compte un message dans un salon"""
+        slot = self._slot(time.monotonic() if now is None else now)
+        counter = self._counters.get(channel_id)
+        if counter is None:
+            counter = self._counters[channel_id] = _SlidingCounter(self.slots)
+            counter.last_slot = slot
+        counter.advance(slot)
+        counter.counts[slot % self.slots] += 1
+
+    def rate(self, channel_id: int, now: float = None) -> float:
+        """Messages par minute dans un salon, sur la fenêtre"""
+        counter = self._counters.get(channel_id)
+        if counter is None:
+            return 0.0
+        counter.advance(self._slot(time.monotonic() if now is None else now))
+        return sum(counter.counts) * 60 / self.window
+
+    def forget(self, channel_id: int):
+        """Oublie un salon (supprimé ou quitté)"""
+        self._counters.pop(channel_id, None)
+
+    # ==================== PONDÉRATION DES APPARITIONS ====================
+
+    def weight(self, channel_id: int, now: float = None) -> float:
+        """
+        Poids d'un salon pour les apparitions
+
+        L'activité est bornée : un salon calme garde une chance (plancher),
+        un salon très actif ne monopolise pas les cadeaux (plafond).
+        """
+        return min(max(self.rate(channel_id, now), config.ACTIVITY_WEIGHT_FLOOR), config.ACTIVITY_WEIGHT_CEILING)
+
+    def choose_channel(self, channels, now: float = None):
+        """Tire un salon, pondéré par son activité"""
+        weights = [self.weight(channel.id, now) for channel in channels]
+        return random.choices(channels, weights=weights)[0]
+
+    def spawn_interval(self, channels, min_interval: int, max_interval: int, now: float = None) -> float:
+        """
+        Délai avant la prochaine apparition, entre min_interval et max_interval (paramètres du serveur)
+
+        Le délai tiré au hasard est rapproché du minimum quand les salons
+        sont actifs (jusqu'au minimum lorsque l'activité totale atteint le plafond).
+        """
+        wait_time = random.randint(min_interval, max_interval)
+        total = sum(self.rate(channel.id, now) for channel in channels)
+        busy = min(total / config.ACTIVITY_WEIGHT_CEILING, 1.0)
+        return min_interval + (wait_time - min_interval) * (1 - busy)
@@ -0,0 +1,246 @@
+"""
+Module d'ordonnancement des appels sortants vers l'API Discord
+
+Tous les appels de bot.http passent par une file à priorités :
+  1. réponses aux interactions (et appels faits pour le gagnant d'un cadeau) ;
+  2. apparitions de cadeaux (et autres appels ordinaires) ;
+  3. suppressions de messages ;
+  4. logs.
+
+Les limites sont celles que discord.py suit pour chaque bucket (en-têtes
+X-RateLimit des réponses de Discord). Quand il ne reste plus dans un bucket
+que la part réservée aux priorités hautes (seulement si des appels
+prioritaires passent par ce bucket), ou pendant une limite globale (429
+global), les appels de faible priorité (suppressions, logs) sont différés
+pour laisser la place aux plus prioritaires. Les interactions et
+les apparitions ne sont jamais retenues : discord.py les fait patienter
+lui-même si le bucket est épuisé.
+
+Les réponses aux interactions et les messages de suivi passent par le
+webhook de l'interaction (hors de bot.http) : elles ne sont jamais
+retardées par cette file.
+"""
+
+import asyncio
+import contextlib
+import contextvars
+import heapq
+import itertools
+import time
+import modules.config as config
+import modules.metrics as metrics
+
+# Classes de priorité (plus petit = plus prioritaire)
+PRIORITY_INTERACTION = 0
+PRIORITY_SPAWN = 1
+PRIORITY_DELETE = 2
+PRIORITY_LOG = 3
+
+PRIORITY_NAMES = {
+    PRIORITY_INTERACTION: "interaction",
+    PRIORITY_SPAWN: "spawn",
+    PRIORITY_DELETE: "delete",
+    PRIORITY_LOG: "log",
+}
+
+# Délai avant de revérifier une limite globale en cours, ou un bucket dont la fin de fenêtre est inconnue (secondes)
+RECHECK_INTERVAL = 0.25
+
+# Un bucket garde sa réserve tant qu'un appel prioritaire y est passé depuis moins de... (secondes)
+PRIORITY_BUCKET_TTL = 60.0
+
+# Au-delà, les buckets sans appel prioritaire récent sont oubliés
+MAX_PRIORITY_BUCKETS = 1000
+
+# Priorité imposée par l'appelant (se propage le long des await)
+_current_priority = contextvars.ContextVar("api_priority", default=None)
+
+
+@contextlib.contextmanager
+def api_priority(priority: int):
+    """
+    Fixe la priorité des appels à l'API faits dans ce bloc
+
+    Exemple :
+        with api_priority(PRIORITY_LOG):
+            await channel.send(embeds=embeds)
+    """
+    token = _current_priority.set(priority)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+def route_priority(route) -> int:
+    """Priorité par défaut d'une route (si l'appelant n'en a pas fixé)"""
+    priority = _current_priority.get()
+    if priority is not None:
+        return priority
+    if route.path.startswith(("/interactions", "/webhooks")):
+        return PRIORITY_INTERACTION
+    if route.method == "DELETE" or route.path.endswith("/bulk-delete"):
+        return PRIORITY_DELETE
+    return PRIORITY_SPAWN
+
+
+def ratelimit_key(http, route) -> str:
+    """Clé du bucket de la route, calculée comme HTTPClient.request"""
+    bucket_hash = getattr(http, '_bucket_hashes', {}).get(route.key)
+    return f"{bucket_hash or route.key}:{route.major_parameters}"
+
+
+def discord_ratelimit(http, route):
+    """État du bucket de la route tenu par discord.py (HTTPClient), ou None si aucun appel n'y est passé"""
+    buckets = getattr(http, '_buckets', None)
+    if buckets is None:
+        return None
+    return buckets.get(ratelimit_key(http, route))
+
+
+def available_calls(ratelimit) -> int:
+    """Appels que le bucket laisse encore partir sans attendre (estimation de discord.py)"""
+    if ratelimit.is_expired():
+        # Fenêtre écoulée : discord.py remettra le bucket à zéro au prochain appel
+        return ratelimit.limit - ratelimit.outgoing
+    return ratelimit.remaining
+
+
+class ApiScheduler:
+    """
+    File à priorités devant HTTPClient.request
+
+    Args:
+        low_priority_reserve: Part de la limite de chaque bucket réservée aux
+            priorités hautes (les suppressions et les logs attendent au-delà)
+    """
+
+    def __init__(self, low_priority_reserve: float = None):
+        self.low_priority_reserve = (config.API_LOW_PRIORITY_RESERVE
+                                     if low_priority_reserve is None else low_priority_reserve)
+
+        self._http = None
+        self._priority_buckets = {}  # Clé de bucket -> dernier appel prioritaire (horloge de la boucle)
+        self._waiters = []  # Tas de (priorité, numéro d'ordre, route, future)
+        self._counter = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._pump = None
+
+    def install(self, http):
+        """Fait passer toutes les requêtes de HTTPClient par la file"""
+        self._http = http
+        original = http.request
+
+        async def request(route, **kwargs):
+            await self.acquire(route, route_priority(route))
+            return await original(route, **kwargs)
+
+        http.request = request
+
+    # ==================== ADMISSION ====================
+
+    def _global_limited(self) -> bool:
+        """Limite globale en cours (discord.py attend la fin d'un 429 global)"""
+        event = getattr(self._http, '_global_over', None)
+        return isinstance(event, asyncio.Event) and not event.is_set()
+
+    def _mark_priority_bucket(self, route, now: float):
+        """Retient qu'un appel prioritaire passe par le bucket de cette route"""
+        if len(self._priority_buckets) >= MAX_PRIORITY_BUCKETS:
+            for key in [key for key, seen in self._priority_buckets.items() if now - seen > PRIORITY_BUCKET_TTL]:
+                del self._priority_buckets[key]
+        self._priority_buckets[ratelimit_key(self._http, route)] = now
+
+    def _has_priority_calls(self, route, now: float) -> bool:
+        """Le bucket de cette route sert-il aussi à des appels prioritaires ?"""
+        seen = self._priority_buckets.get(ratelimit_key(self._http, route))
+        return seen is not None and now - seen <= PRIORITY_BUCKET_TTL
+
+    def _try_admit(self, route, priority: int, taken: dict):
+        """
+        Admet un appel si son bucket le permet
+
+        Args:
+            taken: ID du bucket -> appels déjà admis sur ce passage (pas encore
+                décomptés par discord.py)
+
+        Returns:
+            None si l'appel peut partir, sinon l'instant (horloge de la boucle) où réessayer
+        """
+        now = asyncio.get_running_loop().time()
+        if priority < PRIORITY_DELETE:
+            self._mark_priority_bucket(route, now)
+            return None
+        if self._global_limited():
+            return now + RECHECK_INTERVAL
+        ratelimit = discord_ratelimit(self._http, route)
+        if ratelimit is None:
+            return None
+        reserve = int(ratelimit.limit * self.low_priority_reserve) if self._has_priority_calls(route, now) else 0
+        if available_calls(ratelimit) - taken.get(id(ratelimit), 0) > reserve:
+            taken[id(ratelimit)] = taken.get(id(ratelimit), 0) + 1
+            return None
+        if ratelimit.expires is not None and ratelimit.expires > now:
+            return ratelimit.expires
+        return now + RECHECK_INTERVAL
+
+    async def acquire(self, route, priority: int):
+        """Attend qu'un appel de cette priorité puisse partir sur le bucket de sa route"""
+        # Chemin rapide : aucun appel au moins aussi prioritaire n'attend et le bucket le permet
+        # (discord.py décompte l'appel avant la prochaine attente : rien à réserver ici)
+        if (not self._waiters or self._waiters[0][0] > priority) and self._try_admit(route, priority, {}) is None:
+            metrics.API_SCHEDULED.inc(priority=PRIORITY_NAMES[priority], result="admitted")
+            return
+
+        metrics.API_SCHEDULED.inc(priority=PRIORITY_NAMES[priority], result="deferred")
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._counter), route, future))
+        metrics.API_WAITING.set(len(self._waiters))
+        self._wakeup.set()
+        if self._pump is None or self._pump.done():
+            self._pump = asyncio.create_task(self._run())
+
+        start = time.perf_counter()
+        await future
+        metrics.API_QUEUE_WAIT.observe(time.perf_counter() - start, priority=PRIORITY_NAMES[priority])
+
+    async def _run(self):
+        """Libère les appels en attente, par ordre de priorité, dès que leur bucket le permet"""
+        loop = asyncio.get_running_loop()
+        while self._waiters:
+            remaining = []
+            taken = {}
+            next_wake = None
+            while self._waiters:
+                entry = heapq.heappop(self._waiters)
+                priority, _, route, future = entry
+                if future.cancelled():
+                    continue
+                slot = self._try_admit(route, priority, taken)
+                if slot is None:
+                    future.set_result(None)
+                    continue
+                remaining.append(entry)
+                next_wake = slot if next_wake is None else min(next_wake, slot)
+            for entry in remaining:
+                heapq.heappush(self._waiters, entry)
+            metrics.API_WAITING.set(len(self._waiters))
+            if not self._waiters:
+                break
+
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), max(next_wake - loop.time(), 0.001))
+            except asyncio.TimeoutError:
+                pass
+
+    def close(self):
+        """Arrête la file et libère les appels en attente"""
+        if self._pump is not None:
+            self._pump.cancel()
+            self._pump = None
+        while self._waiters:
+            _, _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(None)
+        metrics.API_WAITING.set(0)
@@ -3,55 +3,77 @@ Module de gestion des livres à gagner
 """
 
 import discord
-import json
 import os
 from modules.config import COLOR_SUCCESS, STAR_EMOJI
+from modules.persistence import load_json
+from modules.state_store import StateStore, AWARD_GRANTED, AWARD_ALREADY_WON
 
 # Livre disponible
 BOOK_TITLE = "Guide de survie au lycée"
 BOOK_EMOJI = "📚"
 
-# Chemin du fichier de sauvegarde
+# Ancien fichier de sauvegarde (importé une fois dans la base d'état)
 DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data")
 WINNERS_FILE = os.path.join(DATA_DIR, "book_winners.json")
 
 
 class BookManager:
-    """Gestionnaire des livres gagnés"""
+    """
+    Gestionnaire des livres gagnés
     
-    def __init__(self):
-        self.winners = []  # Liste des IDs des gagnants de livres
-        self._load_winners()
+    Une seule instance, partagée par tout le bot, est chargée au démarrage :
+    les vérifications se font en mémoire, les gains sont enregistrés dans
+    la base d'état (StateStore).
+    """
+    
+    def __init__(self, store: StateStore):
+        self.store = store
+        self.winners = set()  # Ensemble des IDs des gagnants de livres
+        
+    async def load(self) -> int:
+        """
+        Charge les gagnants depuis la base d'état
+        
+        Au premier démarrage, les gagnants de l'ancien fichier JSON sont importés.
         
-    def _load_winners(self):
-        """Charge la liste des gagnants depuis le fichier"""
-        try:
-            if os.path.exists(WINNERS_FILE):
-                with open(WINNERS_FILE, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    self.winners = data.get('winners', [])
-        except Exception as e:
-            print(f"Erreur lors du chargement des gagnants du livre : {e}")
-            self.winners = []
+        Returns:
+            Le nombre de gagnants chargés
+        """
+        self.winners = await self.store.get_book_winners()
+        if not self.winners and os.path.exists(WINNERS_FILE):
+            legacy = load_json(WINNERS_FILE, {}).get('winners', [])
+            if legacy:
+                await self.store.add_book_winners(legacy)
+                self.winners = set(legacy)
+                print(f"{len(legacy)} gagnant(s) du livre importé(s) depuis {WINNERS_FILE}")
+        return len(self.winners)
     
-    def _save_winners(self):
-        """Sauvegarde la liste des gagnants dans le fichier"""
-        try:
-            # Créer le dossier data s'il n'existe pas
-            os.makedirs(DATA_DIR, exist_ok=True)
-            
-            with open(WINNERS_FILE, 'w', encoding='utf-8') as f:
-                json.dump({'winners': self.winners}, f, indent=2)
-        except Exception as e:
-            print(f"Erreur lors de la sauvegarde des gagnants du livre : {e}")
+    async def reload(self) -> int:
+        """
+        Recharge les gagnants depuis la base d'état (après une modification manuelle)
         
-    def add_winner(self, user: discord.Member):
-        """Ajoute un gagnant à la liste"""
-        if user.id not in self.winners:
-            self.winners.append(user.id)
-            self._save_winners()
-            return True
-        return False
+        Returns:
+            Le nombre de gagnants chargés
+        """
+        return await self.load()
+        
+    async def try_award(self, guild_id: int, user: discord.Member, limit: int) -> bool:
+        """
+        Attribue le livre si le stock le permet (gagnant unique, y compris entre processus)
+
+        Args:
+            guild_id: L'ID du serveur
+            user: Le joueur
+            limit: Stock maximum de livres (-1 = illimité)
+
+        Returns:
+            True si le joueur a gagné le livre
+        """
+        result = await self.store.try_award_book(guild_id, user.id, limit)
+        if result in (AWARD_GRANTED, AWARD_ALREADY_WON):
+            # Déjà gagné : le livre a été attribué par un autre processus du bot
+            self.winners.add(user.id)
+        return result == AWARD_GRANTED
     
     def has_won_book(self, user: discord.Member) -> bool:
         """Vérifie si l'utilisateur a déjà gagné le livre"""
@@ -12,6 +12,30 @@ load_dotenv()
 DISCORD_TOKEN = os.getenv('DISCORD_TOKEN')
 CHANNEL_ID = int(os.getenv('CHANNEL_ID', 0))
 LOG_CHANNEL_ID = int(os.getenv('LOG_CHANNEL_ID', 0))  # Canal pour les logs des gains
+AUTO_SHARD = os.getenv('AUTO_SHARD', '0') == '1'  # Répartir la connexion sur plusieurs shards (grands déploiements)
+# Répartition sur plusieurs processus (avec AUTO_SHARD) : shards gérés par ce processus et nombre total de shards
+SHARD_IDS = [int(shard_id) for shard_id in os.getenv('SHARD_IDS', '').split(',') if shard_id.strip()]  # Vide = tous les shards
+SHARD_COUNT = int(os.getenv('SHARD_COUNT', 0)) or None  # 0 = choisi par Discord (vérifiés au démarrage du bot)
+
+
+def process_file_name(name: str) -> str:
+    """
+    Nom d'un fichier de data/ propre à ce processus
+
+    Un processus qui ne gère qu'une partie des shards suffixe ses fichiers
+    par leurs numéros (journal.jsonl -> journal-shards-0-1.jsonl) : plusieurs
+    processus lancés depuis le même dossier n'écrivent pas dans les mêmes fichiers.
+    """
+    if not SHARD_IDS:
+        return name
+    root, extension = os.path.splitext(name)
+    return f"{root}-shards-{'-'.join(str(shard_id) for shard_id in SHARD_IDS)}{extension}"
+
+
+# Base d'état partagée par tous les processus du bot (fichier local, vide = data/state.db)
+STATE_DB_PATH = os.getenv('STATE_DB_PATH', '')
+LEAN_CACHE = os.getenv('LEAN_CACHE', '0') == '1'  # Ne pas garder les membres en cache (grands serveurs)
+FORCE_COMMAND_SYNC = os.getenv('FORCE_COMMAND_SYNC', '0') == '1'  # Synchroniser les commandes slash même si elles n'ont pas changé
 
 # Configuration du jeu
 GIFT_LIFETIME = 5  # Durée d'apparition du cadeau en secondes
@@ -23,8 +47,61 @@ BOOK_PROBABILITY = 0.05  # 5% de chance de gagner le livre (très rare !)
 # Stock de récompenses
 MAX_ROLES = 10  # Nombre maximum de rôles à distribuer (-1 = illimité)
 MAX_BOOKS = 3   # Nombre maximum de livres à distribuer (-1 = illimité)
-ROLES_GIVEN = 0  # Nombre de rôles déjà distribués
-BOOKS_GIVEN = 0  # Nombre de livres déjà distribués
+# Les quantités déjà distribuées sont conservées dans la base d'état (modules/state_store.py)
+
+# Envoi des logs
+LOG_FLUSH_INTERVAL = 5  # Délai maximal (secondes) avant l'envoi d'un lot de logs
+LOG_QUEUE_SIZE = 500    # Nombre maximal de logs en attente (au-delà, ils sont comptés comme abandonnés)
+
+# Version de l'état affiché, par serveur (configuration, remise à zéro, statut du jeu)
+# Incrémentée à chaque changement pour invalider les embeds mis en cache de ce serveur
+STATE_VERSIONS = {}  # ID du serveur -> version
+
+
+def bump_state_version(guild_id: int):
+    """Signale un changement de configuration, de compteurs ou de statut du jeu sur un serveur"""
+    STATE_VERSIONS[guild_id] = STATE_VERSIONS.get(guild_id, 0) + 1
+
+
+def state_version(guild_id) -> int:
+    """Version de l'état affiché d'un serveur (None : hors serveur, jamais modifié)"""
+    return STATE_VERSIONS.get(guild_id, 0)
+
+
+# Métriques (format Prometheus, servies sur http://METRICS_HOST:METRICS_PORT/metrics)
+METRICS_PORT = int(os.getenv('METRICS_PORT', 0))  # 0 = désactivé
+METRICS_HOST = os.getenv('METRICS_HOST', '127.0.0.1')
+
+# Persistance
+PERSIST_FLUSH_DELAY = 2  # Latence maximale (secondes) avant l'écriture des données sur le disque
+
+# File à priorités des appels à l'API Discord (limites réelles des buckets, suivies par discord.py)
+API_LOW_PRIORITY_RESERVE = 0.4    # Part de la limite de chaque bucket réservée aux interactions et apparitions
+
+# Limitation des clics par utilisateur (seau à jetons)
+CLICK_RATE = 1.0                  # Jetons rechargés par seconde
+CLICK_BURST = 3                   # Clics autorisés d'affilée
+CLICK_THROTTLE_MAX_USERS = 10000  # Nombre maximal d'utilisateurs suivis
+
+# Fun facts (paquets data/fun_facts/*.txt)
+FUN_FACT_PACKS = [name.strip() for name in os.getenv('FUN_FACT_PACKS', '').split(',') if name.strip()]  # Vide = tous les paquets
+
+# Suppression des messages
+FUN_FACT_LIFETIME = 60   # Durée d'affichage d'un fun fact (secondes)
+REAPER_CONCURRENCY = 4   # Nombre maximal de suppressions simultanées
+
+# Journal des cadeaux (data/journal.jsonl)
+JOURNAL_COMMIT_INTERVAL = 0.2   # Latence maximale (secondes) avant l'écriture groupée (un seul fsync)
+JOURNAL_SNAPSHOT_EVERY = 1000   # Nombre d'événements entre deux instantanés des compteurs
+
+# Activité des salons (pondération des apparitions de cadeaux)
+ACTIVITY_WINDOW = 300             # Fenêtre de mesure des messages (secondes)
+ACTIVITY_SLOTS = 30               # Tranches de la fenêtre (précision du glissement)
+ACTIVITY_WEIGHT_FLOOR = 0.5       # Poids minimal d'un salon (messages/min) : un salon calme garde une chance
+ACTIVITY_WEIGHT_CEILING = 20      # Poids maximal d'un salon (messages/min), et activité totale qui ramène l'intervalle au minimum
+
+# Classement
+LEADERBOARD_SIZE = 10    # Nombre de joueurs affichés par classement
 
 # Émojis
 GIFT_EMOJI = "🎁"
@@ -0,0 +1,373 @@
+"""
+Module de rendu des embeds des commandes d'information
+
+Les embeds de /info, /help, /gameconfig et /config (sans argument) sont
+mis en cache par serveur et reconstruits uniquement lorsque la version de
+l'état du jeu de ce serveur change (voir config.bump_state_version).
+Le stock de récompenses est partagé entre les processus du bot : il est
+relu dans la base d'état à chaque commande et inséré dans l'embed en cache.
+Le classement et les statistiques par salon changent à chaque cadeau : ils
+sont reconstruits à chaque commande, à partir des compteurs en mémoire.
+"""
+
+import discord
+import modules.config as config
+from modules.config import CHRISTMAS_TREE_EMOJI, COLOR_INFO
+from modules.state_store import STOCK_ROLES, STOCK_BOOKS, BOARD_CLAIMS, BOARD_WINS
+
+# Styles de commandes (les textes d'aide diffèrent)
+STYLE_SLASH = "slash"
+STYLE_PREFIX = "prefix"
+
+# Nombre maximal de salons affichés par /stats (limite de taille d'un champ d'embed)
+MAX_STATS_CHANNELS = 8
+
+# Champ du stock de récompenses (rempli à chaque affichage, jamais mis en cache)
+STOCK_FIELD_NAME = "📊 Stock de récompenses"
+
+
+def format_limit(limit: int) -> str:
+    """Affiche une limite de stock (-1 = illimité)"""
+    return '∞' if limit == -1 else str(limit)
+
+
+def format_remaining(limit: int, given: int):
+    """Calcule le stock restant (-1 = illimité)"""
+    return limit - given if limit != -1 else "∞"
+
+
+class EmbedRenderer:
+    """Construit et met en cache les embeds des commandes d'information"""
+
+    def __init__(self, bot):
+        self.bot = bot
+        self._cache = {}  # (type, ID du serveur, style) -> (version, embed)
+
+    def _get_cached(self, key):
+        """Retourne l'embed en cache s'il correspond à la version actuelle de son serveur"""
+        entry = self._cache.get(key)
+        if entry is not None and entry[0] == config.state_version(key[1]):
+            return entry[1]
+        return None
+
+    def _store(self, key, version: int, embed: discord.Embed) -> discord.Embed:
+        """Met un embed en cache pour la version donnée"""
+        self._cache[key] = (version, embed)
+        return embed
+
+    # ==================== CHAMPS COMMUNS ====================
+
+    def _channels_mention(self, guild: discord.Guild):
+        """Mentions des salons actifs du serveur, ou None si le jeu est arrêté (ou hors serveur)"""
+        if guild is None:
+            return None
+        gift_manager = self.bot.get_gift_manager(guild)
+        if gift_manager.is_running and gift_manager.channels:
+            return ", ".join([ch.mention for ch in gift_manager.channels])
+        return None
+
+    def _status(self, guild: discord.Guild) -> str:
+        """Statut du jeu sur le serveur (arrêté en message privé)"""
+        if guild is None:
+            return "❌ Arrêté"
+        return "✅ En cours" if self.bot.get_gift_manager(guild).is_running else "❌ Arrêté"
+
+    def _log_channel(self, guild: discord.Guild):
+        """Canal de logs configuré sur ce serveur, ou None"""
+        log_channel_id = self.bot.settings.get(guild.id).log_channel_id
+        return guild.get_channel(log_channel_id) if log_channel_id else None
+
+    @staticmethod
+    def _stock_value(settings, stock: dict) -> str:
+        """Texte du stock de récompenses (limites du serveur)"""
+        roles_remaining = format_remaining(settings.max_roles, stock[STOCK_ROLES])
+        books_remaining = format_remaining(settings.max_books, stock[STOCK_BOOKS])
+        return (
+            f"🎅 Rôles: **{stock[STOCK_ROLES]}** / **{format_limit(settings.max_roles)}** (Restant: **{roles_remaining}**)\n"
+            f"📚 Livres: **{stock[STOCK_BOOKS]}** / **{format_limit(settings.max_books)}** (Restant: **{books_remaining}**)"
+        )
+
+    async def _with_stock(self, embed: discord.Embed, guild: discord.Guild) -> discord.Embed:
+        """Copie d'un embed en cache avec le stock actuel (relu dans la base, commune aux processus)"""
+        stock = await self.bot.store.get_stock(guild.id)
+        value = self._stock_value(self.bot.settings.get(guild.id), stock)
+        embed = embed.copy()
+        for index, field in enumerate(embed.fields):
+            if field.name == STOCK_FIELD_NAME:
+                embed.set_field_at(index, name=STOCK_FIELD_NAME, value=value, inline=False)
+        return embed
+
+    # ==================== EMBEDS ====================
+
+    def info(self, guild: discord.Guild, style: str) -> discord.Embed:
+        """Embed de /info et *info (guild vaut None en message privé)"""
+        key = ("info", guild.id if guild is not None else None, style)
+        embed = self._get_cached(key)
+        if embed is not None:
+            return embed
+        version = config.state_version(key[1])
+
+        embed = discord.Embed(
+            title=f"{CHRISTMAS_TREE_EMOJI} Jeu de Cadeaux de Noël",
+            description="Voici comment jouer :",
+            color=COLOR_INFO
+        )
+
+        embed.add_field(
+            name="🎁 Comment jouer ?",
+            value=f"Des cadeaux apparaissent aléatoirement dans le chat !\n"
+                  f"Soyez le premier à cliquer sur le bouton pour tenter votre chance.\n"
+                  f"⚠️ Attention : les cadeaux disparaissent rapidement s'ils ne sont pas réclamés !",
+            inline=False
+        )
+
+        # Afficher les salons si le jeu est en cours
+        channels_mention = self._channels_mention(guild)
+        if channels_mention:
+            embed.add_field(
+                name="📍 Salon(s) des cadeaux",
+                value=f"Les cadeaux apparaissent dans : {channels_mention}",
+                inline=False
+            )
+
+        embed.add_field(
+            name="🎯 Récompenses",
+            value=f"• Tentez de gagner un rôle spécial de Noël ! 🎅\n"
+                  f"• Ou le livre 'Guide de survie au lycée' ! 📚\n"
+                  f"• Ou découvrez un fun fact sur Noël ! 🎄",
+            inline=False
+        )
+
+        embed.add_field(
+            name="📊 Statut",
+            value=self._status(guild),
+            inline=False
+        )
+
+        gameconfig_hint = "</gameconfig:0>" if style == STYLE_SLASH else "`*gameconfig`"
+        embed.add_field(
+            name="🛠️ Commandes admin",
+            value=f"Utilisez {gameconfig_hint} pour voir la configuration complète du jeu",
+            inline=False
+        )
+
+        return self._store(key, version, embed)
+
+    def help(self, style: str) -> discord.Embed:
+        """Embed de /help et *help (identique sur tous les serveurs)"""
+        key = ("help", None, style)
+        embed = self._get_cached(key)
+        if embed is not None:
+            return embed
+        version = config.state_version(key[1])
+
+        if style == STYLE_SLASH:
+            embed = discord.Embed(
+                title=f"{CHRISTMAS_TREE_EMOJI} Commandes du Bot de Noël",
+                description="Liste des commandes disponibles :",
+                color=COLOR_INFO
+            )
+
+            embed.add_field(
+                name="🎮 Commandes pour tous",
+                value="</info:0> - Affiche les informations sur le jeu\n"
+                      "</leaderboard:0> - Affiche le classement des joueurs\n"
+                      "</help:0> - Affiche cette aide",
+                inline=False
+            )
+
+            embed.add_field(
+                name="🔧 Commandes administrateur",
+                value="</start:0> - Démarre le jeu de cadeaux\n"
+                      "</stop:0> - Arrête le jeu de cadeaux\n"
+                      "</config:0> - Configure les paramètres du jeu sur ce serveur\n"
+                      "</gameconfig:0> - Affiche la configuration actuelle\n"
+                      "</stats:0> - Affiche l'activité et les cadeaux récupérés par salon\n"
+                      "</reset:0> - Réinitialise les compteurs\n\n"
+                      "**Ou utilisez le préfixe `*` :** `*start`, `*stop`, `*gameconfig`, `*stats`, `*reset`, `*removerole`, `*reloadbooks`, `*reloadfacts`, `*sync`",
+                inline=False
+            )
+        else:
+            embed = discord.Embed(
+                title=f"{CHRISTMAS_TREE_EMOJI} Commandes du Bot de Noël",
+                description="Utilisez les commandes slash `/` ou préfixe `*`",
+                color=COLOR_INFO
+            )
+
+            embed.add_field(
+                name="🎮 Pour tous",
+                value="`/info` ou `*info` - Informations sur le jeu\n"
+                      "`/leaderboard` ou `*leaderboard` - Classement des joueurs\n"
+                      "`/help` ou `*help` - Cette aide",
+                inline=False
+            )
+
+            embed.add_field(
+                name="🔧 Admin uniquement",
+                value="`/start` ou `*start` - Démarrer le jeu\n"
+                      "`/stop` ou `*stop` - Arrêter le jeu\n"
+                      "`/config` - Configurer le jeu sur ce serveur\n"
+                      "`/gameconfig` ou `*gameconfig` - Voir la configuration\n"
+                      "`/stats` ou `*stats` - Activité et cadeaux récupérés par salon\n"
+                      "`/reset` ou `*reset` - Réinitialiser les compteurs\n"
+                      "`*removerole @membre` - Retirer le rôle de Noël\n"
+                      "`*reloadbooks` - Recharger les gagnants du livre\n"
+                      "`*reloadfacts` - Recharger les paquets de fun facts\n"
+                      "`*sync` - Synchroniser les commandes slash",
+                inline=False
+            )
+
+        return self._store(key, version, embed)
+
+    async def gameconfig(self, guild: discord.Guild) -> discord.Embed:
+        """Embed de /gameconfig et *gameconfig"""
+        key = ("gameconfig", guild.id, None)
+        embed = self._get_cached(key)
+        if embed is not None:
+            return await self._with_stock(embed, guild)
+        version = config.state_version(key[1])
+        settings = self.bot.settings.get(guild.id)
+
+        embed = discord.Embed(
+            title="⚙️ Configuration du jeu",
+            color=COLOR_INFO
+        )
+
+        # Paramètres du jeu
+        embed.add_field(
+            name="🎮 Paramètres des cadeaux",
+            value=f"• Durée de vie : **{settings.gift_lifetime}s**\n"
+                  f"• Intervalle min : **{settings.min_spawn_interval}s** ({settings.min_spawn_interval//60} min)\n"
+                  f"• Intervalle max : **{settings.max_spawn_interval}s** ({settings.max_spawn_interval//60} min)",
+            inline=False
+        )
+
+        # Probabilités
+        embed.add_field(
+            name="🎲 Probabilités",
+            value=f"• Rôle : **{settings.role_probability*100:.1f}%**\n"
+                  f"• Livre : **{settings.book_probability*100:.1f}%**",
+            inline=False
+        )
+
+        # Stock (rempli par _with_stock)
+        embed.add_field(name=STOCK_FIELD_NAME, value="…", inline=False)
+
+        # Canal de logs
+        log_ch = self._log_channel(guild)
+        embed.add_field(
+            name="📝 Canal de logs",
+            value=log_ch.mention if log_ch else "❌ Non configuré",
+            inline=False
+        )
+
+        # Salons actifs
+        channels_mention = self._channels_mention(guild)
+        if channels_mention:
+            embed.add_field(
+                name="📍 Salon(s) actif(s)",
+                value=channels_mention,
+                inline=False
+            )
+
+        # Statut
+        embed.add_field(
+            name="🔴 Statut du jeu",
+            value=self._status(guild),
+            inline=False
+        )
+
+        return await self._with_stock(self._store(key, version, embed), guild)
+
+    async def config_overview(self, guild: discord.Guild) -> discord.Embed:
+        """Embed de /config sans argument (configuration actuelle)"""
+        key = ("config", guild.id, None)
+        embed = self._get_cached(key)
+        if embed is not None:
+            return await self._with_stock(embed, guild)
+        version = config.state_version(key[1])
+        settings = self.bot.settings.get(guild.id)
+
+        embed = discord.Embed(
+            title="⚙️ Configuration actuelle",
+            color=COLOR_INFO
+        )
+
+        log_ch = self._log_channel(guild)
+
+        embed.add_field(
+            name="Paramètres du jeu",
+            value=f"• Durée de vie des cadeaux: **{settings.gift_lifetime}s**\n"
+                  f"• Intervalle minimum: **{settings.min_spawn_interval}s** ({settings.min_spawn_interval//60} min)\n"
+                  f"• Intervalle maximum: **{settings.max_spawn_interval}s** ({settings.max_spawn_interval//60} min)\n"
+                  f"• Probabilité rôle: **{settings.role_probability*100:.1f}%**\n"
+                  f"• Probabilité livre: **{settings.book_probability*100:.1f}%**\n"
+                  f"• Canal de logs: {log_ch.mention if log_ch else '❌ Non configuré'}",
+            inline=False
+        )
+
+        # Stock (rempli par _with_stock)
+        embed.add_field(name=STOCK_FIELD_NAME, value="…", inline=False)
+
+        return await self._with_stock(self._store(key, version, embed), guild)
+
+    async def leaderboard(self, guild: discord.Guild) -> discord.Embed:
+        """Embed de /leaderboard et *leaderboard (non mis en cache)"""
+        embed = discord.Embed(
+            title="🏆 Classement des joueurs",
+            color=COLOR_INFO
+        )
+
+        for board, name, label in (
+            (BOARD_CLAIMS, "🎁 Cadeaux récupérés", "cadeau(x)"),
+            (BOARD_WINS, "🎅 Récompenses gagnées", "récompense(s)"),
+        ):
+            entries = await self.bot.leaderboard.top(guild.id, board)
+            lines = [
+                f"**{rank}.** <@{user_id}> — **{claims if board == BOARD_CLAIMS else wins}** {label}"
+                for rank, (user_id, claims, wins) in enumerate(entries, start=1)
+            ]
+            embed.add_field(
+                name=name,
+                value="\n".join(lines) if lines else "Personne pour l'instant !",
+                inline=False
+            )
+
+        return embed
+
+    def stats(self, guild: discord.Guild) -> discord.Embed:
+        """Embed de /stats et *stats (non mis en cache)"""
+        embed = discord.Embed(
+            title="📈 Activité des salons",
+            description=f"Messages par minute sur les {config.ACTIVITY_WINDOW // 60} dernières minutes "
+                        f"et cadeaux depuis le début du journal",
+            color=COLOR_INFO
+        )
+
+        # Salons du jeu en cours, puis salons ayant déjà reçu des cadeaux
+        channels = {channel.id: channel for channel in self.bot.get_gift_manager(guild).channels}
+        for channel_id in self.bot.journal.state.channels:
+            channel = guild.get_channel(channel_id)
+            if channel is not None:
+                channels.setdefault(channel_id, channel)
+
+        rows = []
+        for channel in channels.values():
+            spawned, claimed, expired = self.bot.journal.state.channel_stats(channel.id)
+            rows.append((spawned, claimed, expired, self.bot.channel_activity.rate(channel.id), channel))
+        rows.sort(key=lambda row: (row[0], row[3]), reverse=True)
+
+        lines = []
+        for spawned, claimed, expired, rate, channel in rows[:MAX_STATS_CHANNELS]:
+            claim_rate = f"{claimed / spawned * 100:.0f}%" if spawned else "—"
+            lines.append(
+                f"{channel.mention} — 💬 **{rate:.1f}**/min · 🎁 **{spawned}** apparus · "
+                f"✅ **{claimed}** récupérés (**{claim_rate}**) · ⌛ **{expired}** expirés"
+            )
+
+        embed.add_field(
+            name="📍 Par salon",
+            value="\n".join(lines) if lines else "Aucun cadeau pour l'instant !",
+            inline=False
+        )
+        return embed
@@ -3,33 +3,92 @@ Module de gestion des cadeaux
 """
 
 import discord
-import asyncio
-import random
-from datetime import datetime
+import itertools
+import time
+from datetime import datetime, timezone
 import modules.config as config
+import modules.metrics as metrics
+from modules.api_scheduler import api_priority, PRIORITY_INTERACTION
+from modules.journal import EVENT_SPAWN, EVENT_CLAIM, EVENT_EXPIRE
+from modules.reaper import RETRY_DELAY
 from modules.config import (
     GIFT_EMOJI,
     CHRISTMAS_TREE_EMOJI,
     COLOR_GIFT
 )
 
+# Seuil d'alerte pour l'accusé de réception d'un clic (Discord exige moins de 3 s)
+SLOW_ACK_WARNING_MS = 2000
+
+# custom_id du bouton d'un cadeau : l'ID du cadeau y est encodé
+GIFT_CUSTOM_ID_TEMPLATE = r"botnoel:gift:(?P<gift_id>[0-9]+)"
+
+# Partie basse des IDs de cadeau (évite les doublons dans une même milliseconde)
+_gift_id_sequence = itertools.count()
+
+
+def next_gift_id() -> int:
+    """Génère un ID de cadeau unique (format snowflake, connu avant l'envoi du message)"""
+    timestamp = discord.utils.time_snowflake(datetime.now(timezone.utc))
+    return timestamp | (next(_gift_id_sequence) & 0x3FFFFF)
+
+
+class Gift:
+    """État d'un cadeau actif (message et réclamation)"""
+    
+    def __init__(self, gift_id: int, message: discord.Message, channel):
+        self.id = gift_id  # Encodé dans le custom_id du bouton
+        self.message = message
+        self.channel = channel
+        self.claimed_by = None
+        self.spawned_at = datetime.now()
+        self._spawned_monotonic = time.monotonic()
+        self.expiry = None  # Échéance d'expiration planifiée
+        self.ack_ms = None  # Délai clic -> accusé de réception du gagnant (ms)
+        self.shed_clicks = 0  # Clics ignorés par la limitation par utilisateur
+        
+    def try_claim(self, user) -> bool:
+        """
+        Réclame le cadeau s'il est encore libre (comparer-et-affecter)
+        
+        Aucun await entre la vérification et l'affectation : sur la boucle
+        d'événements, l'opération est atomique.
+        
+        Returns:
+            True si l'utilisateur est le gagnant
+        """
+        if self.claimed_by is not None:
+            return False
+        self.claimed_by = user
+        return True
+
 
 class GiftManager:
-    """Gestionnaire des apparitions de cadeaux"""
+    """Gestionnaire des apparitions de cadeaux (une instance par serveur)"""
     
-    def __init__(self, bot):
+    def __init__(self, bot, guild_id: int):
         self.bot = bot
-        self.active_gift = None
+        self.guild_id = guild_id
+        self.scheduler = bot.scheduler  # Planificateur central partagé
         self.is_running = False
-        self.claimed_by = None
         self.channels = []  # Liste des salons pour les cadeaux
-        self._claim_lock = asyncio.Lock()  # Verrou pour éviter les claims simultanés
+        self.gifts = {}  # Cadeaux actifs, indexés par ID de cadeau
+        self._next_spawn = None  # Prochaine apparition planifiée
+        
+    def get_gift(self, gift_id: int):
+        """Retourne le cadeau actif correspondant à l'ID, ou None"""
+        return self.gifts.get(gift_id)
+        
+    def has_active_gift(self, channel) -> bool:
+        """Vérifie si un cadeau est déjà actif dans ce canal"""
+        return any(gift.channel.id == channel.id for gift in self.gifts.values())
         
     async def spawn_gift(self, channel):
         """Fait apparaître un cadeau dans le canal"""
-        # Ne pas spawner si un cadeau est déjà actif
-        if self.active_gift is not None:
+        # Ne pas spawner si un cadeau est déjà actif dans ce canal
+        if self.has_active_gift(channel):
             return
+        lifetime = self.bot.settings.get(self.guild_id).gift_lifetime
         
         # Créer l'embed du cadeau
         embed = discord.Embed(
@@ -38,52 +97,137 @@ class GiftManager:
             color=COLOR_GIFT,
             timestamp=datetime.now()
         )
-        embed.set_footer(text=f"Ce cadeau disparaîtra dans {config.GIFT_LIFETIME} secondes...")
+        embed.set_footer(text=f"Ce cadeau disparaîtra dans {lifetime} secondes...")
         
-        # Créer le bouton
-        view = GiftView(self)
+        # Créer le bouton (routé par son custom_id, sans vue ni minuterie propres)
+        gift_id = next_gift_id()
+        view = discord.ui.View(timeout=None)
+        view.add_item(GiftButton(gift_id))
         
-        # Envoyer le message
-        self.active_gift = await channel.send(embed=embed, view=view)
-        self.claimed_by = None
+        # Envoyer le message et enregistrer le cadeau
+        message = await channel.send(embed=embed, view=view)
+        gift = Gift(gift_id, message, channel)
+        self._register(gift, lifetime)
+        metrics.GIFTS_SPAWNED.inc(channel=channel.id)
+        self.bot.journal.append(EVENT_SPAWN, guild=self.guild_id, channel=channel.id, gift=gift_id)
         
-        # Attendre la durée de vie du cadeau
-        await asyncio.sleep(config.GIFT_LIFETIME)
+        # Suppression du message à l'expiration (sauvegardée, survit à un redémarrage)
+        self.bot.reaper.schedule(channel.id, message.id, lifetime)
+        await self.bot.store.add_gift(gift_id, self.guild_id, channel.id, message.id, time.time() + lifetime)
         
-        # Si personne n'a récupéré le cadeau, le supprimer
-        if self.claimed_by is None and self.active_gift:
-            try:
-                await self.active_gift.delete()
-            except discord.NotFound:
-                pass
-            self.active_gift = None
-            
-    async def claim_gift(self, interaction: discord.Interaction):
-        """Gère la réclamation d'un cadeau"""
-        # Utiliser un verrou pour éviter les claims simultanés
-        async with self._claim_lock:
-            # Vérifier si quelqu'un a déjà réclamé ce cadeau
-            if self.claimed_by is not None:
-                await interaction.response.send_message(
-                    f"Trop tard ! {self.claimed_by.mention} a déjà récupéré ce cadeau !",
-                    ephemeral=True
-                )
-                return None
-                
-            # Marquer le cadeau comme réclamé
-            self.claimed_by = interaction.user
+    def restore_gift(self, gift_id: int, channel, message_id: int, expires_at: float):
+        """
+        Réactive un cadeau encore affiché après un redémarrage
+        
+        Args:
+            channel: Le salon du cadeau (un PartialMessageable suffit)
+            expires_at: Instant d'expiration (horodatage time.time())
+        """
+        gift = Gift(gift_id, channel.get_partial_message(message_id), channel)
+        self._register(gift, max(expires_at - time.time(), 0))
+        
+    def _register(self, gift: Gift, lifetime: float):
+        """Ajoute un cadeau au registre et planifie son expiration"""
+        self.gifts[gift.id] = gift
+        gift.expiry = self.scheduler.call_later(
+            lifetime,
+            lambda: self.expire_gift(gift.id)
+        )
+        
+    def expire_gift(self, gift_id: int):
+        """Oublie un cadeau que personne n'a récupéré à temps (son message est supprimé par le reaper)"""
+        gift = self.gifts.get(gift_id)
+        if gift is None or gift.claimed_by is not None:
+            return None
+        
+        del self.gifts[gift_id]
+        metrics.GIFTS_EXPIRED.inc(channel=gift.channel.id)
+        self.bot.journal.append(EVENT_EXPIRE, guild=self.guild_id, channel=gift.channel.id, gift=gift_id)
+        metrics.SHED_CLICKS_PER_GIFT.observe(gift.shed_clicks)
+        return self.bot.store.remove_gift(self.guild_id, gift_id)
             
-            # Supprimer le message du cadeau
-            if self.active_gift:
-                try:
-                    await self.active_gift.delete()
-                except discord.NotFound:
-                    pass
-                self.active_gift = None
-                
-            return interaction.user
+    async def claim_gift(self, interaction: discord.Interaction, gift_id: int):
+        """
+        Gère la réclamation d'un cadeau
+        
+        Le gagnant est désigné sans verrou ni attente : les clics perdants
+        reçoivent leur réponse en parallèle. Le gagnant est acquitté
+        immédiatement (defer) : le résultat du tirage lui est envoyé ensuite
+        en message de suivi.
+        
+        Args:
+            interaction: Le clic sur le bouton
+            gift_id: L'ID du cadeau (extrait du custom_id du bouton)
+        
+        Returns:
+            Le cadeau réclamé si l'utilisateur l'a gagné, sinon None
+        """
+        gift = self.get_gift(gift_id)
+        
+        # Clics trop rapprochés d'un même utilisateur : ignorés sans réponse
+        # (aucun appel à l'API, ni arbitrage)
+        if not self.bot.click_throttle.allow(interaction.user.id):
+            if gift is not None:
+                gift.shed_clicks += 1
+            metrics.CLAIM_CLICKS.inc(result="throttled")
+            return None
+        
+        if gift is None:
+            metrics.CLAIM_CLICKS.inc(result="gone")
+            await interaction.response.send_message(
+                "Ce cadeau n'est plus disponible !",
+                ephemeral=True
+            )
+            return None
+        
+        # Arbitrage synchrone (sans await) : le premier clic traité l'emporte
+        if not gift.try_claim(interaction.user):
+            metrics.CLAIM_CLICKS.inc(result="late")
+            await interaction.response.send_message(
+                f"Trop tard ! {gift.claimed_by.mention} a déjà récupéré ce cadeau !",
+                ephemeral=True
+            )
+            return None
+        
+        # Annuler l'expiration (le cadeau reste connu jusqu'à la suppression de
+        # son message, pour que les clics suivants sachent qui l'a récupéré)
+        if gift.expiry is not None:
+            gift.expiry.cancel()
+        self.bot.reaper.cancel(gift.message.id)
+        metrics.CLAIM_CLICKS.inc(result="won")
+        metrics.GIFTS_CLAIMED.inc(channel=gift.channel.id)
+        metrics.SPAWN_TO_CLAIM.observe(time.monotonic() - gift._spawned_monotonic)
+        self.bot.journal.append(EVENT_CLAIM, guild=self.guild_id, channel=gift.channel.id,
+                                gift=gift_id, user=interaction.user.id)
         
-    async def start_spawn_loop(self, channels):
+        # Supprimer le message du cadeau en arrière-plan, hors du chemin du clic
+        # (planifié avant l'acquittement : le cadeau est retiré même si defer échoue)
+        self.scheduler.call_later(0, lambda: self._remove_claimed_gift(gift))
+        
+        # Acquitter tout de suite pour respecter le délai de 3 secondes
+        await interaction.response.defer(thinking=True)
+        gift.ack_ms = (discord.utils.utcnow() - interaction.created_at).total_seconds() * 1000
+        metrics.INTERACTION_ACK.observe(gift.ack_ms / 1000)
+        if gift.ack_ms > SLOW_ACK_WARNING_MS:
+            print(f"⚠️ Accusé de réception lent : {gift.ack_ms:.0f} ms")
+        return gift
+        
+    async def _remove_claimed_gift(self, gift: Gift):
+        """Supprime le message d'un cadeau récupéré puis l'oublie"""
+        try:
+            await gift.message.delete()
+        except discord.NotFound:
+            pass
+        except discord.HTTPException as e:
+            # Erreur temporaire : le reaper réessaiera plus tard
+            print(f"Erreur lors de la suppression du cadeau {gift.id} : {e}")
+            self.bot.reaper.schedule(gift.channel.id, gift.message.id, RETRY_DELAY)
+        finally:
+            self.gifts.pop(gift.id, None)
+            metrics.SHED_CLICKS_PER_GIFT.observe(gift.shed_clicks)
+            await self.bot.store.remove_gift(self.guild_id, gift.id)
+        
+    def start_spawn_loop(self, channels):
         """
         Lance la boucle d'apparition des cadeaux
         Args:
@@ -96,43 +240,75 @@ class GiftManager:
             channels = [channels]
         
         self.channels = channels
+        config.bump_state_version(self.guild_id)
+        self._schedule_next_spawn(self.scheduler.time())
         
-        while self.is_running:
-            # Attendre un délai aléatoire
-            wait_time = random.randint(config.MIN_SPAWN_INTERVAL, config.MAX_SPAWN_INTERVAL)
-            await asyncio.sleep(wait_time)
-            
-            # Faire apparaître un cadeau dans un canal aléatoire
-            if self.is_running and self.channels:
-                random_channel = random.choice(self.channels)
-                await self.spawn_gift(random_channel)
+    def _schedule_next_spawn(self, after: float):
+        """Planifie la prochaine apparition à un délai aléatoire après `after` (plus court si les salons sont actifs)"""
+        settings = self.bot.settings.get(self.guild_id)
+        wait_time = self.bot.channel_activity.spawn_interval(
+            self.channels, settings.min_spawn_interval, settings.max_spawn_interval
+        )
+        deadline = after + wait_time
+        self._next_spawn = self.scheduler.call_at(
+            deadline,
+            lambda: self._on_spawn_due(deadline)
+        )
+        
+    def _on_spawn_due(self, deadline: float):
+        """Échéance d'apparition : planifie la suivante puis fait apparaître un cadeau"""
+        if not self.is_running or not self.channels:
+            return None
+        
+        # La cadence part de l'échéance prévue, indépendamment de la durée de vie
+        self._schedule_next_spawn(deadline)
+        
+        # Faire apparaître un cadeau dans un canal tiré au hasard, pondéré par son activité
+        channel = self.bot.channel_activity.choose_channel(self.channels)
+        return self.spawn_gift(channel)
                 
     def stop_spawn_loop(self):
         """Arrête la boucle d'apparition des cadeaux"""
         self.is_running = False
         self.channels = []
+        config.bump_state_version(self.guild_id)
+        if self._next_spawn is not None:
+            self._next_spawn.cancel()
+            self._next_spawn = None
 
 
-class GiftView(discord.ui.View):
-    """Vue contenant le bouton pour récupérer le cadeau"""
+class GiftButton(discord.ui.DynamicItem[discord.ui.Button], template=GIFT_CUSTOM_ID_TEMPLATE):
+    """
+    Bouton pour récupérer un cadeau
+    
+    Enregistré une seule fois (bot.add_dynamic_items) : tout clic dont le
+    custom_id correspond au modèle est routé vers le cadeau encodé, y
+    compris après un redémarrage du bot.
+    """
     
-    def __init__(self, gift_manager: GiftManager):
-        super().__init__(timeout=config.GIFT_LIFETIME)
-        self.gift_manager = gift_manager
-        
-    @discord.ui.button(label="Récupérer le cadeau !", style=discord.ButtonStyle.success, emoji=GIFT_EMOJI)
-    async def claim_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-        """Bouton pour récupérer le cadeau"""
-        # Importer ici pour éviter les imports circulaires
-        from modules.lottery import LotteryManager
-        
-        user = await self.gift_manager.claim_gift(interaction)
-        
-        if user:
-            # Lancer le tirage au sort
-            lottery = LotteryManager(self.gift_manager.bot)
-            await lottery.run_lottery(interaction, user)
+    def __init__(self, gift_id: int):
+        super().__init__(
+            discord.ui.Button(
+                label="Récupérer le cadeau !",
+                style=discord.ButtonStyle.success,
+                emoji=GIFT_EMOJI,
+                custom_id=f"botnoel:gift:{gift_id}"
+            )
+        )
+        self.gift_id = gift_id
+        
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: discord.ui.Button, match):
+        """Reconstruit le bouton à partir du custom_id cliqué"""
+        return cls(int(match['gift_id']))
+        
+    async def callback(self, interaction: discord.Interaction):
+        """Clic : résout le cadeau dans le registre du serveur puis lance le tirage"""
+        bot = interaction.client
+        # Les appels faits pour ce clic (rôle, membre...) passent avant le nettoyage et les logs
+        with api_priority(PRIORITY_INTERACTION):
+            gift = await bot.get_gift_manager(interaction.guild).claim_gift(interaction, self.gift_id)
             
-            # Désactiver le bouton
-            button.disabled = True
-            self.stop()
+            if gift:
+                # Lancer le tirage au sort
+                await bot.lottery.run_lottery(interaction, gift.claimed_by, ack_ms=gift.ack_ms)
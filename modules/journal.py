@@ -0,0 +1,215 @@
+"""
+Module du journal des cadeaux (ajout seul, fsync groupés)
+
+Chaque apparition, réclamation, résultat de tirage et expiration est ajouté
+au journal (une ligne JSON numérotée par événement). Les ajouts ne bloquent
+pas : ils sont regroupés et écrits sur le disque avec un seul fsync toutes
+les JOURNAL_COMMIT_INTERVAL secondes.
+
+Tous les JOURNAL_SNAPSHOT_EVERY événements, les compteurs sont sauvegardés
+dans un instantané compact et le journal est vidé. Au démarrage,
+l'instantané puis la fin du journal sont rejoués : la reprise coûte le
+nombre d'événements récents, pas la taille de tout l'historique.
+"""
+
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+import modules.config as config
+from modules.persistence import atomic_write_json, load_json
+
+# Fichiers du journal
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data")
+JOURNAL_FILE = os.path.join(DATA_DIR, config.process_file_name("journal.jsonl"))
+SNAPSHOT_FILE = os.path.join(DATA_DIR, config.process_file_name("journal_snapshot.json"))
+
+# Types d'événements
+EVENT_SPAWN = "spawn"
+EVENT_CLAIM = "claim"
+EVENT_OUTCOME = "outcome"
+EVENT_EXPIRE = "expire"
+
+# Compteur de salon incrémenté par chaque type d'événement
+_CHANNEL_COUNTERS = {EVENT_SPAWN: 0, EVENT_CLAIM: 1, EVENT_EXPIRE: 2}
+
+
+class JournalState:
+    """Compteurs reconstruits à partir du journal"""
+
+    def __init__(self):
+        self.channels = {}  # ID du salon -> [apparus, récupérés, expirés]
+        self.outcomes = {}  # ID du serveur -> {résultat du tirage: nombre}
+
+    def apply(self, event: dict):
+        """Applique un événement aux compteurs"""
+        index = _CHANNEL_COUNTERS.get(event['type'])
+        if index is not None:
+            counters = self.channels.setdefault(event['channel'], [0, 0, 0])
+            counters[index] += 1
+        elif event['type'] == EVENT_OUTCOME:
+            outcomes = self.outcomes.setdefault(event['guild'], {})
+            outcomes[event['outcome']] = outcomes.get(event['outcome'], 0) + 1
+
+    def channel_stats(self, channel_id: int) -> tuple:
+        """Retourne (apparus, récupérés, expirés) pour un salon"""
+        return tuple(self.channels.get(channel_id, (0, 0, 0)))
+
+    def to_dict(self) -> dict:
+        return {
+            'channels': {str(channel_id): list(counters) for channel_id, counters in self.channels.items()},
+            'outcomes': {str(guild_id): dict(outcomes) for guild_id, outcomes in self.outcomes.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "JournalState":
+        state = cls()
+        state.channels = {int(channel_id): list(counters) for channel_id, counters in data.get('channels', {}).items()}
+        state.outcomes = {int(guild_id): dict(outcomes) for guild_id, outcomes in data.get('outcomes', {}).items()}
+        return state
+
+
+class ClaimJournal:
+    """Journal des cadeaux, avec instantanés périodiques et reprise au démarrage"""
+
+    def __init__(self, path: str = JOURNAL_FILE, snapshot_path: str = SNAPSHOT_FILE,
+                 commit_interval: float = None, snapshot_every: int = None):
+        """
+        Args:
+            path: Fichier du journal (JSON, une ligne par événement)
+            snapshot_path: Fichier de l'instantané des compteurs
+            commit_interval: Latence maximale avant l'écriture d'un événement (secondes)
+            snapshot_every: Nombre d'événements entre deux instantanés
+        """
+        self.path = path
+        self.snapshot_path = snapshot_path
+        self.commit_interval = config.JOURNAL_COMMIT_INTERVAL if commit_interval is None else commit_interval
+        self.snapshot_every = snapshot_every or config.JOURNAL_SNAPSHOT_EVERY
+        self.state = JournalState()
+        self.seq = 0  # Numéro du dernier événement
+        self._since_snapshot = 0
+        self._buffer = []  # Lignes en attente d'écriture
+        self._file = None
+        self._commit_task = None
+        self._lock = asyncio.Lock()
+        # Un seul thread : écritures, fsync et instantanés restent dans l'ordre
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="journal")
+
+    async def _run(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    # ==================== REPRISE ====================
+
+    async def open(self):
+        """Rejoue l'instantané puis la fin du journal, et ouvre le journal en ajout"""
+        start = time.perf_counter()
+        replayed = await self._run(self._open_sync)
+        print(f"Journal : instantané #{self.seq - replayed} + {replayed} événement(s) rejoué(s) "
+              f"en {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    def _open_sync(self) -> int:
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+
+        snapshot = load_json(self.snapshot_path, None)
+        if snapshot is not None:
+            self.seq = snapshot['seq']
+            self.state = JournalState.from_dict(snapshot['state'])
+
+        replayed = 0
+        valid_end = 0  # Fin de la dernière ligne complète
+        if os.path.exists(self.path):
+            with open(self.path, 'rb') as f:
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break  # Dernière ligne incomplète (arrêt brutal pendant l'écriture)
+                    valid_end += len(line)
+                    try:
+                        event = json.loads(line)
+                    except ValueError:
+                        continue
+                    # Événements déjà compris dans l'instantané
+                    if event['seq'] <= self.seq:
+                        continue
+                    self.state.apply(event)
+                    self.seq = event['seq']
+                    replayed += 1
+            # Retirer la ligne incomplète : les ajouts suivants repartent d'une ligne propre
+            if os.path.getsize(self.path) > valid_end:
+                os.truncate(self.path, valid_end)
+
+        self._since_snapshot = replayed
+        self._file = open(self.path, 'a', encoding='utf-8')
+        return replayed
+
+    # ==================== AJOUT ====================
+
+    def append(self, event_type: str, **fields):
+        """
+        Ajoute un événement (non bloquant : écrit au prochain fsync groupé)
+
+        Exemple :
+            journal.append(EVENT_CLAIM, guild=guild_id, channel=channel_id, gift=gift_id, user=user_id)
+        """
+        self.seq += 1
+        event = {'seq': self.seq, 't': round(time.time(), 3), 'type': event_type}
+        event.update(fields)
+        self.state.apply(event)
+        self._buffer.append(json.dumps(event, separators=(',', ':')) + "\n")
+        self._since_snapshot += 1
+
+        if self._commit_task is None or self._commit_task.done():
+            self._commit_task = asyncio.create_task(self._commit_later())
+
+    async def _commit_later(self):
+        await asyncio.sleep(self.commit_interval)
+        await self.flush()
+
+    async def flush(self):
+        """Écrit les événements en attente (un seul fsync) et prend un instantané si besoin"""
+        async with self._lock:
+            # Journal pas encore ouvert (ou déjà fermé) : les événements restent en attente
+            if self._file is None:
+                return
+            if not self._buffer and self._since_snapshot < self.snapshot_every:
+                return
+
+            # Lignes et compteurs pris au même instant : l'instantané correspond exactement à self.seq
+            lines, self._buffer = self._buffer, []
+            snapshot = None
+            if self._since_snapshot >= self.snapshot_every:
+                snapshot = {'seq': self.seq, 'state': self.state.to_dict()}
+                self._since_snapshot = 0
+
+            try:
+                await self._run(self._write_sync, lines, snapshot)
+            except Exception as e:
+                print(f"Erreur lors de l'écriture du journal : {e}")
+                self._buffer[:0] = lines
+                if snapshot is not None:
+                    self._since_snapshot = self.snapshot_every
+
+    def _write_sync(self, lines, snapshot):
+        if lines:
+            self._file.writelines(lines)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+        if snapshot is not None:
+            atomic_write_json(self.snapshot_path, snapshot)
+            # Tout le journal est compris dans l'instantané : il repart de zéro
+            # (un arrêt avant cette étape est sans effet, la reprise filtre par numéro)
+            self._file.truncate(0)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    async def close(self):
+        """Écrit les événements en attente et ferme le journal (à l'arrêt du bot)"""
+        if self._commit_task is not None and not self._commit_task.done():
+            self._commit_task.cancel()
+        if self._file is not None:
+            await self.flush()
+            file, self._file = self._file, None
+            await self._run(file.close)
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,111 @@
+"""
+Module du classement des joueurs (cadeaux récupérés et gains)
+
+Les totaux par joueur sont tenus à jour dans la base d'état à chaque cadeau
+récupéré (voir StateStore.record_claim). Le bot garde en mémoire, par
+serveur, les K meilleurs de chaque classement : une consultation coûte
+O(K), sans requête ni parcours de l'historique. Au redémarrage, chaque
+classement est relu depuis l'index de la base à sa première consultation.
+"""
+
+import asyncio
+import modules.config as config
+from modules.state_store import BOARD_CLAIMS, BOARD_WINS
+
+
+class TopK:
+    """Les K meilleurs joueurs d'un classement, triés du premier au dernier"""
+
+    def __init__(self, board: str, size: int, entries=()):
+        """
+        Args:
+            board: BOARD_CLAIMS ou BOARD_WINS
+            size: Nombre de joueurs gardés
+            entries: Liste initiale de (user_id, claims, wins), déjà triée
+        """
+        self.board = board
+        self.size = size
+        self.entries = list(entries)[:size]
+
+    def _key(self, entry) -> tuple:
+        """Clé de tri décroissante : score du classement, l'autre score, puis l'ID (comme la base)"""
+        user_id, claims, wins = entry
+        return (claims, wins, -user_id) if self.board == BOARD_CLAIMS else (wins, claims, -user_id)
+
+    def update(self, user_id: int, claims: int, wins: int):
+        """
+        Met à jour les totaux d'un joueur
+
+        Les totaux ne font qu'augmenter : un joueur ne peut que monter, et
+        un joueur hors du top K n'y entre que s'il dépasse le dernier.
+        """
+        entry = (user_id, claims, wins)
+        key = self._key(entry)
+        if key[0] <= 0:
+            return
+
+        for index, current in enumerate(self.entries):
+            if current[0] == user_id:
+                del self.entries[index]
+                break
+        else:
+            if len(self.entries) >= self.size and key <= self._key(self.entries[-1]):
+                return
+
+        # Remonter depuis la fin jusqu'à sa place (au plus K comparaisons)
+        index = len(self.entries)
+        while index > 0 and key > self._key(self.entries[index - 1]):
+            index -= 1
+        self.entries.insert(index, entry)
+        del self.entries[self.size:]
+
+
+class Leaderboard:
+    """Classements par serveur, chargés à la demande et mis à jour à chaque cadeau"""
+
+    def __init__(self, store, size: int = None):
+        """
+        Args:
+            store: La base d'état (StateStore)
+            size: Nombre de joueurs par classement
+        """
+        self.store = store
+        self.size = size or config.LEADERBOARD_SIZE
+        self._boards = {}   # (ID du serveur, classement) -> TopK
+        self._loading = {}  # (ID du serveur, classement) -> tâche de chargement
+
+    async def top(self, guild_id: int, board: str) -> list:
+        """
+        Retourne les meilleurs joueurs d'un serveur
+
+        Returns:
+            Liste de (user_id, claims, wins), du premier au dernier
+        """
+        key = (guild_id, board)
+        top_k = self._boards.get(key)
+        if top_k is None:
+            # Un seul chargement même si plusieurs commandes arrivent en même temps
+            task = self._loading.get(key)
+            if task is None:
+                task = asyncio.create_task(self._load(guild_id, board))
+                self._loading[key] = task
+            top_k = await asyncio.shield(task)
+        return list(top_k.entries)
+
+    async def _load(self, guild_id: int, board: str) -> TopK:
+        key = (guild_id, board)
+        try:
+            rows = await self.store.get_leaderboard(guild_id, board, self.size)
+            # Les mises à jour arrivées pendant la lecture y sont déjà (base sérialisée)
+            top_k = self._boards[key] = TopK(board, self.size, rows)
+            return top_k
+        finally:
+            del self._loading[key]
+
+    def update(self, guild_id: int, user_id: int, claims: int, wins: int):
+        """Prend en compte les nouveaux totaux d'un joueur (retournés par record_claim)"""
+        for board in (BOARD_CLAIMS, BOARD_WINS):
+            top_k = self._boards.get((guild_id, board))
+            # Classement pas encore chargé : il sera lu à jour depuis la base
+            if top_k is not None:
+                top_k.update(user_id, claims, wins)
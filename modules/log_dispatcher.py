@@ -0,0 +1,157 @@
+"""
+Module d'envoi groupé des logs dans le canal de logs
+"""
+
+import asyncio
+import time
+import discord
+import modules.config as config
+import modules.metrics as metrics
+from modules.api_scheduler import api_priority, PRIORITY_LOG
+
+# Discord accepte au plus 10 embeds par message
+MAX_EMBEDS_PER_MESSAGE = 10
+
+# Nombre de tentatives d'envoi d'un lot en cas de limitation (429)
+MAX_SEND_ATTEMPTS = 5
+
+
+class LogDispatcher:
+    """
+    File d'envoi des logs
+
+    Les embeds sont regroupés par canal (jusqu'à 10 par message) et envoyés
+    dès qu'un lot est plein ou au plus tard après LOG_FLUSH_INTERVAL secondes.
+    Les logs perdus sont comptés au lieu d'être ignorés silencieusement.
+    """
+
+    def __init__(self, bot):
+        self.bot = bot
+        self._queue = asyncio.Queue(maxsize=config.LOG_QUEUE_SIZE)
+        self._task = None
+        self._batch = []  # Lot en cours de constitution
+
+        # Compteurs depuis le démarrage
+        self.sent = 0      # Embeds envoyés
+        self.dropped = 0   # Embeds abandonnés (file pleine)
+        self.failed = 0    # Embeds dont l'envoi a échoué
+        self._reported = (0, 0)
+
+    def start(self):
+        """Démarre la tâche d'envoi"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def submit(self, channel_id: int, embed: discord.Embed) -> bool:
+        """
+        Ajoute un embed à la file d'envoi (sans attendre)
+
+        Returns:
+            False si la file est pleine et que l'embed a été abandonné
+        """
+        try:
+            self._queue.put_nowait((channel_id, embed, time.monotonic()))
+            return True
+        except asyncio.QueueFull:
+            self.dropped += 1
+            metrics.LOGS.inc(result="dropped")
+            return False
+
+    async def _run(self):
+        """Boucle d'envoi : constitue un lot puis l'envoie"""
+        loop = asyncio.get_running_loop()
+        while True:
+            self._batch = [await self._queue.get()]
+            deadline = loop.time() + config.LOG_FLUSH_INTERVAL
+
+            # Compléter le lot jusqu'à la taille ou au délai maximal
+            while len(self._batch) < MAX_EMBEDS_PER_MESSAGE:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    self._batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            batch, self._batch = self._batch, []
+            try:
+                await self._send_batch(batch)
+            except Exception as e:
+                # La tâche d'envoi ne doit jamais s'arrêter : le lot est compté en échec
+                print(f"Erreur inattendue lors de l'envoi des logs : {e}")
+                self._count_failed(len(batch))
+            self._report()
+
+    async def _send_batch(self, batch):
+        """Envoie un lot, regroupé par canal"""
+        by_channel = {}
+        for channel_id, embed, submitted_at in batch:
+            by_channel.setdefault(channel_id, []).append((embed, submitted_at))
+
+        for channel_id, entries in by_channel.items():
+            for i in range(0, len(entries), MAX_EMBEDS_PER_MESSAGE):
+                chunk = entries[i:i + MAX_EMBEDS_PER_MESSAGE]
+                if await self._send(channel_id, [embed for embed, _ in chunk]):
+                    now = time.monotonic()
+                    for _, submitted_at in chunk:
+                        metrics.LOG_DISPATCH.observe(now - submitted_at)
+
+    async def _send(self, channel_id: int, embeds) -> bool:
+        """
+        Envoie un message de logs, en patientant en cas de limitation (429)
+
+        Returns:
+            True si le message a été envoyé
+        """
+        channel = self.bot.get_channel(channel_id)
+        if channel is None:
+            self._count_failed(len(embeds))
+            return False
+
+        backoff = 1.0
+        for _ in range(MAX_SEND_ATTEMPTS):
+            try:
+                with api_priority(PRIORITY_LOG):
+                    await channel.send(embeds=embeds)
+                self.sent += len(embeds)
+                metrics.LOGS.inc(len(embeds), result="sent")
+                return True
+            except discord.RateLimited as e:
+                await asyncio.sleep(e.retry_after)
+            except discord.HTTPException as e:
+                if e.status != 429:
+                    print(f"Erreur lors de l'envoi des logs : {e}")
+                    break
+                await asyncio.sleep(backoff)
+                backoff *= 2
+            except Exception as e:
+                # Erreur réseau après les nouveaux essais de discord.py (OSError, aiohttp, délai dépassé)
+                print(f"Erreur lors de l'envoi des logs : {e}")
+                break
+
+        self._count_failed(len(embeds))
+        return False
+
+    def _count_failed(self, count: int):
+        self.failed += count
+        metrics.LOGS.inc(count, result="failed")
+
+    def _report(self):
+        """Affiche les logs perdus lorsque leur nombre augmente"""
+        current = (self.dropped, self.failed)
+        if current != self._reported:
+            self._reported = current
+            print(f"⚠️ Logs perdus depuis le démarrage : {self.dropped} abandonné(s), {self.failed} en échec")
+
+    async def close(self):
+        """Arrête la tâche d'envoi et envoie les logs encore en file"""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+        batch, self._batch = self._batch, []
+        while not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        if batch:
+            await self._send_batch(batch)
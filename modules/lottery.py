@@ -12,11 +12,12 @@ from modules.config import (
     COLOR_FAIL,
     COLOR_INFO,
     STAR_EMOJI,
-    SNOWFLAKE_EMOJI,
-    LOG_CHANNEL_ID
+    SNOWFLAKE_EMOJI
 )
 from modules.fun_facts import get_random_fun_fact
-from modules.books import BookManager, BOOK_TITLE, BOOK_EMOJI
+from modules.books import BOOK_TITLE, BOOK_EMOJI
+from modules.state_store import STOCK_ROLES, STOCK_BOOKS
+from modules.journal import EVENT_OUTCOME
 
 
 class LotteryManager:
@@ -24,22 +25,51 @@ class LotteryManager:
     
     def __init__(self, bot):
         self.bot = bot
-        self.book_manager = BookManager()
+        self.store = bot.store  # Base d'état (stock, gagnants, historique)
+        self.book_manager = bot.book_manager  # Index partagé des gagnants
+        self._background_tasks = set()  # Logs et écritures hors du chemin critique
         
-    async def run_lottery(self, interaction: discord.Interaction, user: discord.Member):
+    def _run_in_background(self, coro):
+        """Lance une coroutine sans bloquer la réponse au joueur"""
+        task = asyncio.create_task(coro)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+        
+    def _record_claim(self, interaction: discord.Interaction, user: discord.Member, outcome: str, ack_ms: float):
+        """Enregistre le cadeau récupéré dans le journal, l'historique et le classement (en arrière-plan)"""
+        self.bot.journal.append(EVENT_OUTCOME, guild=interaction.guild_id, channel=interaction.channel_id,
+                                user=user.id, outcome=outcome)
+        self._run_in_background(self._record_claim_async(
+            interaction.guild_id, interaction.channel_id, user.id, outcome, ack_ms
+        ))
+        
+    async def _record_claim_async(self, guild_id: int, channel_id: int, user_id: int, outcome: str, ack_ms: float):
+        claims, wins = await self.store.record_claim(guild_id, channel_id, user_id, outcome, ack_ms)
+        self.bot.leaderboard.update(guild_id, user_id, claims, wins)
+        
+    async def run_lottery(self, interaction: discord.Interaction, user: discord.Member, ack_ms: float = None):
         """
         Lance le tirage au sort pour un utilisateur
         
+        L'interaction doit déjà avoir été acquittée (defer) : le résultat est
+        envoyé en message de suivi.
+        
         Args:
-            interaction: L'interaction Discord
+            interaction: L'interaction Discord (déjà acquittée)
             user: L'utilisateur qui a récupéré le cadeau
+            ack_ms: Délai entre le clic et l'accusé de réception (ms)
         """
-        # Logger l'ouverture du cadeau
-        await self.log_gift_claim(interaction.guild, user)
+        # En mode cache léger, l'utilisateur peut ne pas être un membre complet
+        if not isinstance(user, discord.Member):
+            user = await self.bot.resolve_member(interaction.guild, user.id)
+        
+        # Logger l'ouverture du cadeau (envoi groupé, hors du chemin critique)
+        self.log_gift_claim(interaction.guild, user)
         
         # Vérifier si l'utilisateur a déjà tout gagné (rôle ET livre)
-        role = await self.get_or_create_role(interaction.guild)
-        has_role = role in user.roles
+        # Le rôle n'est créé que s'il est gagné
+        role = self.bot.role_cache.get(interaction.guild)
+        has_role = role is not None and user.get_role(role.id) is not None
         has_book = self.book_manager.has_won_book(user)
         
         if has_role and has_book:
@@ -50,82 +80,84 @@ class LotteryManager:
                            f"Laissez les autres jouer ! 🎄",
                 color=COLOR_INFO
             )
-            await interaction.response.send_message(embed=embed)
+            await interaction.followup.send(embed=embed)
+            self._record_claim(interaction, user, "all_won", ack_ms)
             return
         
+        settings = self.bot.settings.get(interaction.guild_id)
+        
         # Tirage pour le livre (prioritaire et très rare !)
         if not has_book:
-            # Vérifier le stock de livres
-            if config.MAX_BOOKS != -1 and config.BOOKS_GIVEN >= config.MAX_BOOKS:
-                # Plus de livres disponibles
-                pass
-            else:
-                won_book = random.random() < config.BOOK_PROBABILITY
+            won_book = random.random() < settings.book_probability
+            
+            # Réserver un livre dans le stock et inscrire le gagnant (refusé si épuisé
+            # ou si le livre a déjà été gagné depuis un autre processus du bot)
+            if won_book and await self.book_manager.try_award(interaction.guild_id, user, settings.max_books):
+                # L'utilisateur gagne le livre !
                 
-                if won_book:
-                    # L'utilisateur gagne le livre !
-                    self.book_manager.add_winner(user)
-                    config.BOOKS_GIVEN += 1
-                    
-                    embed = self.book_manager.create_win_embed(user)
-                    await interaction.response.send_message(embed=embed)
-                    
-                    # Logger le gain
-                    await self.log_win(interaction.guild, user, "book")
-                    return
+                embed = self.book_manager.create_win_embed(user)
+                await interaction.followup.send(embed=embed)
+                
+                # Logger le gain
+                self._record_claim(interaction, user, "book", ack_ms)
+                self._run_in_background(self.log_win(interaction.guild, user, "book"))
+                return
         
         # Tirage pour le rôle
         if not has_role:
-            # Vérifier le stock de rôles
-            if config.MAX_ROLES != -1 and config.ROLES_GIVEN >= config.MAX_ROLES:
-                # Plus de rôles disponibles
-                pass
-            else:
-                has_won_role = random.random() < config.ROLE_PROBABILITY
-                
-                if has_won_role:
-                    # L'utilisateur gagne le rôle !
-                    try:
-                        await user.add_roles(role)
-                        config.ROLES_GIVEN += 1
-                        
-                        embed = discord.Embed(
-                            title=f"{STAR_EMOJI} FÉLICITATIONS ! {STAR_EMOJI}",
-                            description=f"🎊 {user.mention} a gagné le rôle **{CHRISTMAS_ROLE_NAME}** ! 🎊\n\n"
-                                       f"Bienvenue dans l'équipe des lutins du Père Noël ! 🎅",
-                            color=COLOR_SUCCESS
-                        )
-                        embed.set_thumbnail(url=user.display_avatar.url)
-                        
-                        await interaction.response.send_message(embed=embed)
-                        
-                        # Logger le gain
-                        await self.log_win(interaction.guild, user, "role")
-                        
-                    except discord.Forbidden:
-                        # Erreur de permissions
-                        embed = discord.Embed(
-                            title="❌ Erreur de permissions",
-                            description=f"Vous avez gagné, mais je ne peux pas vous attribuer le rôle !\n\n"
-                                       f"**Raisons possibles :**\n"
-                                       f"• Mon rôle doit être au-dessus du rôle '{CHRISTMAS_ROLE_NAME}' dans la hiérarchie\n"
-                                       f"• Je dois avoir la permission 'Gérer les rôles'\n\n"
-                                       f"Contactez un administrateur !",
-                            color=COLOR_FAIL
-                        )
-                        await interaction.response.send_message(embed=embed)
-                    except Exception as e:
-                        # Autre erreur
-                        embed = discord.Embed(
-                            title="❌ Erreur inattendue",
-                            description=f"Une erreur est survenue : {str(e)}",
-                            color=COLOR_FAIL
-                        )
-                        await interaction.response.send_message(embed=embed)
+            has_won_role = random.random() < settings.role_probability
+            
+            # Réserver un rôle dans le stock (refusé si épuisé)
+            if has_won_role and await self.store.try_take_stock(interaction.guild_id, STOCK_ROLES, settings.max_roles):
+                # L'utilisateur gagne le rôle !
+                # Seule l'attribution du rôle rend le stock en cas d'échec : une
+                # fois le rôle donné, le stock reste pris même si l'envoi échoue
+                try:
+                    role = await self.get_or_create_role(interaction.guild)
+                    await user.add_roles(role)
+                except discord.Forbidden:
+                    # Erreur de permissions : rendre le rôle au stock
+                    await self.store.release_stock(interaction.guild_id, STOCK_ROLES)
+                    embed = discord.Embed(
+                        title="❌ Erreur de permissions",
+                        description=f"Vous avez gagné, mais je ne peux pas vous attribuer le rôle !\n\n"
+                                   f"**Raisons possibles :**\n"
+                                   f"• Mon rôle doit être au-dessus du rôle '{CHRISTMAS_ROLE_NAME}' dans la hiérarchie\n"
+                                   f"• Je dois avoir la permission 'Gérer les rôles'\n\n"
+                                   f"Contactez un administrateur !",
+                        color=COLOR_FAIL
+                    )
+                    self._record_claim(interaction, user, "role_error", ack_ms)
+                    await interaction.followup.send(embed=embed)
+                    return
+                except Exception as e:
+                    # Autre erreur : rendre le rôle au stock
+                    await self.store.release_stock(interaction.guild_id, STOCK_ROLES)
+                    embed = discord.Embed(
+                        title="❌ Erreur inattendue",
+                        description=f"Une erreur est survenue : {str(e)}",
+                        color=COLOR_FAIL
+                    )
+                    self._record_claim(interaction, user, "role_error", ack_ms)
+                    await interaction.followup.send(embed=embed)
                     return
+                
+                # Logger le gain (avant l'envoi : le rôle est attribué quoi qu'il arrive)
+                self._record_claim(interaction, user, "role", ack_ms)
+                self._run_in_background(self.log_win(interaction.guild, user, "role"))
+                
+                embed = discord.Embed(
+                    title=f"{STAR_EMOJI} FÉLICITATIONS ! {STAR_EMOJI}",
+                    description=f"🎊 {user.mention} a gagné le rôle **{CHRISTMAS_ROLE_NAME}** ! 🎊\n\n"
+                               f"Bienvenue dans l'équipe des lutins du Père Noël ! 🎅",
+                    color=COLOR_SUCCESS
+                )
+                embed.set_thumbnail(url=user.display_avatar.url)
+                await interaction.followup.send(embed=embed)
+                return
         
         # L'utilisateur ne gagne rien, on lui donne un fun fact
-        fun_fact = get_random_fun_fact()
+        fun_fact = get_random_fun_fact(interaction.channel_id)
         
         embed = discord.Embed(
             title=f"{SNOWFLAKE_EMOJI} Pas de chance cette fois !",
@@ -134,27 +166,28 @@ class LotteryManager:
             color=COLOR_FAIL
         )
         
-        await interaction.response.send_message(embed=embed)
+        message = await interaction.followup.send(embed=embed, wait=True)
+        self._record_claim(interaction, user, "fun_fact", ack_ms)
         
-        # Supprimer le message après 1 minute (60 secondes)
-        await asyncio.sleep(60)
-        try:
-            await interaction.delete_original_response()
-        except:
-            pass  # Ignorer si le message est déjà supprimé
+        # Supprimer le message après FUN_FACT_LIFETIME secondes
+        self.bot.reaper.schedule(message.channel.id, message.id, config.FUN_FACT_LIFETIME)
+    
+    def _get_log_channel(self, guild: discord.Guild):
+        """Retourne le canal de logs du serveur, ou None s'il n'est pas configuré"""
+        log_channel_id = self.bot.settings.get(guild.id).log_channel_id
+        if log_channel_id == 0:
+            return None  # Pas de canal de logs configuré
+        return guild.get_channel(log_channel_id)
     
-    async def log_gift_claim(self, guild: discord.Guild, user: discord.Member):
+    def log_gift_claim(self, guild: discord.Guild, user: discord.Member):
         """
-        Log l'ouverture d'un cadeau dans le canal de logs
+        Log l'ouverture d'un cadeau dans le canal de logs (via la file d'envoi)
         
         Args:
             guild: Le serveur Discord
             user: L'utilisateur qui a ouvert le cadeau
         """
-        if LOG_CHANNEL_ID == 0:
-            return  # Pas de canal de logs configuré
-        
-        log_channel = guild.get_channel(LOG_CHANNEL_ID)
+        log_channel = self._get_log_channel(guild)
         if log_channel is None:
             return
         
@@ -166,29 +199,26 @@ class LotteryManager:
         )
         embed.set_thumbnail(url=user.display_avatar.url)
         
-        try:
-            await log_channel.send(embed=embed)
-        except:
-            pass  # Ignorer les erreurs de log
+        self.bot.log_dispatcher.submit(log_channel.id, embed)
     
     async def log_win(self, guild: discord.Guild, user: discord.Member, win_type: str):
         """
-        Log un gain dans le canal de logs
+        Log un gain dans le canal de logs (via la file d'envoi)
         
         Args:
             guild: Le serveur Discord
             user: L'utilisateur qui a gagné
             win_type: Type de gain ("role" ou "book")
         """
-        if LOG_CHANNEL_ID == 0:
-            return  # Pas de canal de logs configuré
-        
-        log_channel = guild.get_channel(LOG_CHANNEL_ID)
+        log_channel = self._get_log_channel(guild)
         if log_channel is None:
             return
         
+        stock = await self.store.get_stock(guild.id)
+        settings = self.bot.settings.get(guild.id)
+        
         if win_type == "book":
-            books_remaining = config.MAX_BOOKS - config.BOOKS_GIVEN if config.MAX_BOOKS != -1 else "∞"
+            books_remaining = settings.max_books - stock[STOCK_BOOKS] if settings.max_books != -1 else "∞"
             
             embed = discord.Embed(
                 title=f"{BOOK_EMOJI} Livre gagné !",
@@ -203,7 +233,7 @@ class LotteryManager:
                 inline=False
             )
         elif win_type == "role":
-            roles_remaining = config.MAX_ROLES - config.ROLES_GIVEN if config.MAX_ROLES != -1 else "∞"
+            roles_remaining = settings.max_roles - stock[STOCK_ROLES] if settings.max_roles != -1 else "∞"
             
             embed = discord.Embed(
                 title=f"🎅 Rôle gagné !",
@@ -220,14 +250,11 @@ class LotteryManager:
         else:
             return
         
-        try:
-            await log_channel.send(embed=embed)
-        except:
-            pass  # Ignorer les erreurs de log
+        self.bot.log_dispatcher.submit(log_channel.id, embed)
             
     async def get_or_create_role(self, guild: discord.Guild) -> discord.Role:
         """
-        Récupère ou crée le rôle de Noël
+        Récupère ou crée le rôle de Noël (via le cache de rôles du bot)
         
         Args:
             guild: Le serveur Discord
@@ -235,16 +262,4 @@ class LotteryManager:
         Returns:
             Le rôle de Noël
         """
-        # Chercher si le rôle existe déjà
-        role = discord.utils.get(guild.roles, name=CHRISTMAS_ROLE_NAME)
-        
-        if role is None:
-            # Créer le rôle s'il n'existe pas
-            role = await guild.create_role(
-                name=CHRISTMAS_ROLE_NAME,
-                color=discord.Color.red(),
-                hoist=True,  # Afficher séparément dans la liste des membres
-                mentionable=True
-            )
-            
-        return role
+        return await self.bot.role_cache.get_or_create(guild)
@@ -0,0 +1,278 @@
+"""
+Module de métriques (format texte Prometheus)
+
+Compteurs et histogrammes en mémoire, exposés en option sur un petit
+serveur HTTP local qui tourne sur la boucle d'événements du bot
+(METRICS_PORT dans la configuration, 0 = désactivé).
+"""
+
+import asyncio
+import time
+import discord
+
+# Bornes par défaut des histogrammes de latence (secondes)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+# Bornes du délai entre l'apparition et la récupération d'un cadeau (secondes)
+CLAIM_DELAY_BUCKETS = (0.25, 0.5, 1, 2, 3, 5, 10, 30, 60, 300)
+
+
+def _escape(value) -> str:
+    """Échappe une valeur d'étiquette"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=()) -> str:
+    """Formate les étiquettes : {nom="valeur",...}"""
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs.extend(f'{name}="{value}"' for name, value in extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_number(value: float) -> str:
+    """Formate un nombre (entier si possible)"""
+    if value == float('inf'):
+        return "+Inf"
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Metric:
+    """Base commune : nom, description et étiquettes"""
+
+    kind = None
+
+    def __init__(self, name: str, description: str, labels=()):
+        self.name = name
+        self.description = description
+        self.label_names = tuple(labels)
+        self._series = {}  # Valeurs des étiquettes -> état de la série
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(labels.get(name, "") for name in self.label_names)
+
+    def render(self):
+        """Lignes au format texte Prometheus"""
+        yield f"# HELP {self.name} {self.description}"
+        yield f"# TYPE {self.name} {self.kind}"
+
+
+class Counter(Metric):
+    """Compteur croissant"""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        self._series[key] = self._series.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._series.get(self._key(labels), 0)
+
+    def render(self):
+        yield from super().render()
+        for key, value in self._series.items():
+            yield f"{self.name}{_format_labels(self.label_names, key)} {_format_number(value)}"
+
+
+class Gauge(Counter):
+    """Valeur instantanée (peut monter ou descendre)"""
+
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        self._series[self._key(labels)] = value
+
+
+class Histogram(Metric):
+    """Histogramme à bornes fixes (compte, somme et répartition cumulée)"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, description: str, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, description, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        series = self._series.get(key)
+        if series is None:
+            # [compte par borne..., compte au-delà, somme]
+            series = [0] * (len(self.buckets) + 1) + [0.0]
+            self._series[key] = series
+
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[index] += 1
+                break
+        else:
+            series[len(self.buckets)] += 1
+        series[-1] += value
+
+    def count(self, **labels) -> int:
+        series = self._series.get(self._key(labels))
+        return sum(series[:-1]) if series else 0
+
+    def sum(self, **labels) -> float:
+        series = self._series.get(self._key(labels))
+        return series[-1] if series else 0.0
+
+    def render(self):
+        yield from super().render()
+        for key, series in self._series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), series[:-1]):
+                cumulative += count
+                labels = _format_labels(self.label_names, key, [("le", _format_number(bound))])
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.label_names, key)
+            yield f"{self.name}_sum{labels} {_format_number(series[-1])}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+class Registry:
+    """Ensemble des métriques exposées"""
+
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """Toutes les métriques au format texte Prometheus"""
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+# ==================== MÉTRIQUES DU JEU ====================
+
+GIFTS_SPAWNED = REGISTRY.register(Counter(
+    "botnoel_gifts_spawned_total", "Cadeaux apparus", ["channel"]))
+GIFTS_CLAIMED = REGISTRY.register(Counter(
+    "botnoel_gifts_claimed_total", "Cadeaux récupérés", ["channel"]))
+GIFTS_EXPIRED = REGISTRY.register(Counter(
+    "botnoel_gifts_expired_total", "Cadeaux expirés sans être récupérés", ["channel"]))
+SPAWN_TO_CLAIM = REGISTRY.register(Histogram(
+    "botnoel_spawn_to_claim_seconds", "Délai entre l'apparition et la récupération d'un cadeau",
+    buckets=CLAIM_DELAY_BUCKETS))
+CLAIM_CLICKS = REGISTRY.register(Counter(
+    "botnoel_claim_clicks_total",
+    "Clics sur un cadeau (won = gagnant, late = trop tard, gone = cadeau disparu, throttled = ignoré)",
+    ["result"]))
+SHED_CLICKS_PER_GIFT = REGISTRY.register(Histogram(
+    "botnoel_shed_clicks_per_gift", "Clics ignorés par la limitation par utilisateur, par cadeau",
+    buckets=(0, 1, 5, 10, 50, 100, 500)))
+INTERACTION_ACK = REGISTRY.register(Histogram(
+    "botnoel_interaction_ack_seconds", "Délai entre le clic et l'accusé de réception du gagnant"))
+LOGS = REGISTRY.register(Counter(
+    "botnoel_logs_total", "Logs du canal de logs (sent = envoyé, dropped = file pleine, failed = échec d'envoi)",
+    ["result"]))
+LOG_DISPATCH = REGISTRY.register(Histogram(
+    "botnoel_log_dispatch_seconds", "Délai entre la soumission d'un log et son envoi"))
+API_QUEUE_WAIT = REGISTRY.register(Histogram(
+    "botnoel_api_queue_wait_seconds", "Attente d'un appel différé dans la file à priorités de l'API",
+    ["priority"]))
+API_SCHEDULED = REGISTRY.register(Counter(
+    "botnoel_api_scheduler_calls_total",
+    "Appels passés par la file à priorités (admitted = partis sans attendre, deferred = mis en attente)",
+    ["priority", "result"]))
+API_WAITING = REGISTRY.register(Gauge(
+    "botnoel_api_scheduler_waiting", "Appels en attente dans la file à priorités de l'API"))
+REAPER_PENDING = REGISTRY.register(Gauge(
+    "botnoel_reaper_pending_messages", "Messages dont la suppression est planifiée"))
+REAPER_RUNNING = REGISTRY.register(Gauge(
+    "botnoel_reaper_running_deletions", "Suppressions de messages en cours"))
+DISCORD_API = REGISTRY.register(Histogram(
+    "botnoel_discord_api_seconds", "Durée des appels à l'API Discord (attentes 429 comprises)",
+    ["method", "route", "status"]))
+
+
+def instrument_http(http):
+    """
+    Mesure la durée des appels à l'API Discord, par route
+
+    Enveloppe HTTPClient.request de discord.py : la route est le modèle
+    du chemin (ex : /channels/{channel_id}/messages), pas le chemin réel.
+    """
+    original = http.request
+
+    async def request(route, **kwargs):
+        start = time.perf_counter()
+        status = "ok"
+        try:
+            return await original(route, **kwargs)
+        except discord.HTTPException as e:
+            status = str(e.status)
+            raise
+        except discord.RateLimited:
+            status = "429"
+            raise
+        except Exception:
+            status = "error"
+            raise
+        finally:
+            DISCORD_API.observe(
+                time.perf_counter() - start,
+                method=route.method, route=route.path, status=status
+            )
+
+    http.request = request
+
+
+# ==================== SERVEUR HTTP ====================
+
+class MetricsServer:
+    """Serveur HTTP minimal qui répond à GET /metrics"""
+
+    def __init__(self, port: int, host: str = "127.0.0.1", registry: Registry = REGISTRY):
+        self.port = port
+        self.host = host
+        self.registry = registry
+        self._server = None
+
+    async def start(self):
+        """Démarre l'écoute sur la boucle d'événements courante"""
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        print(f"📈 Métriques disponibles sur http://{self.host}:{self.port}/metrics")
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Traite une requête HTTP (une par connexion)"""
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), 5)
+            # Ignorer les en-têtes
+            while True:
+                line = await asyncio.wait_for(reader.readline(), 5)
+                if line in (b"\r\n", b"\n", b""):
+                    break
+
+            parts = request_line.decode('latin-1').split()
+            if len(parts) >= 2 and parts[0] == "GET" and parts[1].split('?')[0] == "/metrics":
+                status, body = "200 OK", self.registry.render().encode('utf-8')
+                content_type = "text/plain; version=0.0.4; charset=utf-8"
+            else:
+                status, body = "404 Not Found", b"Not Found\n"
+                content_type = "text/plain; charset=utf-8"
+
+            writer.write(
+                f"HTTP/1.1 {status}\r\n"
+                f"Content-Type: {content_type}\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: close\r\n\r\n".encode('latin-1') + body
+            )
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def close(self):
+        """Arrête le serveur"""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
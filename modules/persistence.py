@@ -0,0 +1,113 @@
+"""
+Module de persistance différée (write-behind) des fichiers de données
+"""
+
+import asyncio
+import json
+import os
+import tempfile
+import time
+import modules.config as config
+
+
+def atomic_write_json(path: str, data):
+    """
+    Écrit un fichier JSON de façon atomique (fichier temporaire puis renommage)
+
+    Un arrêt brutal pendant l'écriture laisse l'ancien fichier intact.
+    """
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=".json")
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, separators=(',', ':'))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def load_json(path: str, default):
+    """
+    Charge un fichier JSON
+
+    Un fichier illisible est mis de côté (suffixe .corrupt) au lieu d'être
+    écrasé silencieusement par la prochaine sauvegarde.
+    """
+    if not os.path.exists(path):
+        return default
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        backup = f"{path}.corrupt-{int(time.time())}"
+        print(f"⚠️ Fichier {path} illisible ({e}), copie conservée dans {backup}")
+        try:
+            os.replace(path, backup)
+        except OSError:
+            pass
+        return default
+
+
+class WriteBehindFile:
+    """
+    Sauvegarde différée d'un fichier JSON
+
+    Les modifications sont regroupées : une seule écriture a lieu au plus
+    `flush_delay` secondes après la première modification, sur un thread
+    de travail pour ne pas bloquer la boucle d'événements.
+    """
+
+    def __init__(self, path: str, snapshot, flush_delay: float = None):
+        """
+        Args:
+            path: Chemin du fichier JSON
+            snapshot: Fonction retournant les données à sauvegarder
+            flush_delay: Latence maximale avant écriture (secondes)
+        """
+        self.path = path
+        self._snapshot = snapshot
+        self.flush_delay = config.PERSIST_FLUSH_DELAY if flush_delay is None else flush_delay
+        self._dirty = False
+        self._flush_task = None
+        self._write_lock = asyncio.Lock()
+
+    def mark_dirty(self):
+        """Signale une modification, à écrire lors du prochain vidage"""
+        self._dirty = True
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        """Attend la latence maximale puis écrit les modifications"""
+        await asyncio.sleep(self.flush_delay)
+        await self.flush()
+
+    async def flush(self):
+        """Écrit immédiatement les modifications en attente"""
+        async with self._write_lock:
+            if not self._dirty:
+                return
+            self._dirty = False
+
+            # Copie prise sur la boucle, écriture sur un thread
+            data = self._snapshot()
+            loop = asyncio.get_running_loop()
+            try:
+                await loop.run_in_executor(None, atomic_write_json, self.path, data)
+            except Exception as e:
+                print(f"Erreur lors de la sauvegarde de {self.path} : {e}")
+                self._dirty = True
+
+    async def close(self):
+        """Vide les modifications en attente (à appeler à l'arrêt)"""
+        if self._flush_task is not None and not self._flush_task.done():
+            self._flush_task.cancel()
+        await self.flush()
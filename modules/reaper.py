@@ -0,0 +1,164 @@
+"""
+Module de suppression différée des messages (cadeaux expirés, fun facts)
+
+Un seul service possède la file des messages à supprimer : pas de
+coroutine en attente par message. Les suppressions arrivées à échéance
+en même temps sont regroupées par salon (suppression groupée quand c'est possible),
+exécutées avec une concurrence bornée et sauvegardées sur le disque pour
+survivre à un redémarrage.
+"""
+
+import asyncio
+import heapq
+import os
+import time
+import discord
+import modules.config as config
+import modules.metrics as metrics
+from modules.persistence import WriteBehindFile, load_json
+
+# Fichier des suppressions en attente
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data")
+PENDING_FILE = os.path.join(DATA_DIR, config.process_file_name("pending_deletions.json"))
+
+# Discord accepte de 2 à 100 messages par suppression groupée
+MAX_BULK_DELETE = 100
+
+# Délai avant un nouvel essai après une erreur temporaire (secondes)
+RETRY_DELAY = 30
+
+
+class MessageReaper:
+    """File centrale des messages à supprimer à une échéance donnée"""
+
+    def __init__(self, http, path: str = PENDING_FILE, concurrency: int = None):
+        """
+        Args:
+            http: Client HTTP de discord.py (bot.http)
+            path: Fichier de sauvegarde des suppressions en attente
+            concurrency: Nombre maximal de requêtes de suppression simultanées
+        """
+        self.http = http
+        self._heap = []      # Tas de (échéance, ID du message)
+        self._pending = {}   # ID du message -> (échéance, ID du salon)
+        self._semaphore = asyncio.Semaphore(concurrency or config.REAPER_CONCURRENCY)
+        self._wakeup = asyncio.Event()
+        self._runner = None
+        self._tasks = set()
+        self._no_bulk = set()  # Salons où la suppression groupée a été refusée
+        self._file = WriteBehindFile(path, self._snapshot)
+
+    def _snapshot(self):
+        """Données sauvegardées : [échéance, ID du salon, ID du message]"""
+        return [[deadline, channel_id, message_id] for message_id, (deadline, channel_id) in self._pending.items()]
+
+    async def start(self):
+        """Recharge les suppressions sauvegardées et démarre la file"""
+        for deadline, channel_id, message_id in load_json(self._file.path, []):
+            self._push(deadline, channel_id, message_id)
+        metrics.REAPER_PENDING.set(len(self._pending))
+        if self._pending:
+            print(f"{len(self._pending)} suppression(s) de message reprise(s)")
+        self._runner = asyncio.create_task(self._run())
+
+    def schedule(self, channel_id: int, message_id: int, delay: float):
+        """
+        Planifie la suppression d'un message
+
+        Args:
+            channel_id: L'ID du salon du message
+            message_id: L'ID du message
+            delay: Délai avant la suppression (secondes)
+        """
+        self._push(time.time() + delay, channel_id, message_id)
+        self._file.mark_dirty()
+        metrics.REAPER_PENDING.set(len(self._pending))
+
+    def cancel(self, message_id: int):
+        """Annule la suppression planifiée d'un message (s'il y en a une)"""
+        if self._pending.pop(message_id, None) is not None:
+            self._file.mark_dirty()
+            metrics.REAPER_PENDING.set(len(self._pending))
+
+    def _push(self, deadline: float, channel_id: int, message_id: int):
+        self._pending[message_id] = (deadline, channel_id)
+        heapq.heappush(self._heap, (deadline, message_id))
+        if self._heap[0][1] == message_id:
+            self._wakeup.set()
+
+    async def _run(self):
+        """Boucle : déclenche les suppressions arrivées à échéance"""
+        while True:
+            now = time.time()
+            by_channel = {}
+            # Seuls les messages arrivés à échéance : aucun n'est supprimé en avance
+            while self._heap and self._heap[0][0] <= now:
+                deadline, message_id = heapq.heappop(self._heap)
+                entry = self._pending.get(message_id)
+                # Entrée annulée ou replanifiée entre-temps
+                if entry is None or entry[0] != deadline:
+                    continue
+                del self._pending[message_id]
+                by_channel.setdefault(entry[1], []).append(message_id)
+
+            for channel_id, message_ids in by_channel.items():
+                for i in range(0, len(message_ids), MAX_BULK_DELETE):
+                    self._spawn(self._delete(channel_id, message_ids[i:i + MAX_BULK_DELETE]))
+            if by_channel:
+                self._file.mark_dirty()
+                metrics.REAPER_PENDING.set(len(self._pending))
+
+            timeout = max(self._heap[0][0] - time.time(), 0) if self._heap else None
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def _spawn(self, coro):
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._on_task_done)
+        metrics.REAPER_RUNNING.set(len(self._tasks))
+
+    def _on_task_done(self, task):
+        self._tasks.discard(task)
+        metrics.REAPER_RUNNING.set(len(self._tasks))
+
+    async def _delete(self, channel_id: int, message_ids):
+        """Supprime des messages d'un même salon (groupé si possible)"""
+        if len(message_ids) > 1 and channel_id not in self._no_bulk:
+            async with self._semaphore:
+                try:
+                    await self.http.delete_messages(channel_id, message_ids)
+                    return
+                except discord.Forbidden:
+                    # Permission « Gérer les messages » absente : ne plus tenter la
+                    # suppression groupée dans ce salon (une requête perdue par lot sinon)
+                    self._no_bulk.add(channel_id)
+                except discord.HTTPException:
+                    # Message trop ancien : supprimer un par un
+                    # (le bot peut toujours supprimer ses propres messages)
+                    pass
+
+        await asyncio.gather(*(self._delete_one(channel_id, message_id) for message_id in message_ids))
+
+    async def _delete_one(self, channel_id: int, message_id: int):
+        """Supprime un message, en réessayant plus tard après une erreur temporaire"""
+        async with self._semaphore:
+            try:
+                await self.http.delete_message(channel_id, message_id)
+            except (discord.NotFound, discord.Forbidden):
+                pass  # Déjà supprimé, ou salon inaccessible
+            except (discord.HTTPException, discord.RateLimited) as e:
+                print(f"Erreur lors de la suppression du message {message_id} : {e}")
+                self.schedule(channel_id, message_id, RETRY_DELAY)
+
+    async def close(self):
+        """Arrête la file et sauvegarde les suppressions en attente"""
+        if self._runner is not None:
+            self._runner.cancel()
+            self._runner = None
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        await self._file.close()
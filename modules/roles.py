@@ -0,0 +1,102 @@
+"""
+Module de résolution du rôle de Noël (cache par serveur)
+"""
+
+import asyncio
+import discord
+from modules.config import CHRISTMAS_ROLE_NAME
+
+
+class RoleCache:
+    """
+    Cache par serveur de l'ID du rôle de Noël
+
+    Les créations simultanées sur un même serveur sont regroupées en un
+    seul appel, ce qui évite de créer le rôle en double.
+    """
+
+    def __init__(self, role_name: str = CHRISTMAS_ROLE_NAME):
+        self.role_name = role_name
+        self._role_ids = {}  # ID du serveur -> ID du rôle
+        self._pending = {}   # ID du serveur -> création en cours
+        # ID du serveur -> rôle créé par le bot, pas encore dans guild.roles
+        # (create_role ne l'y ajoute pas : il y arrive avec GUILD_ROLE_CREATE)
+        self._created = {}
+
+    def warm(self, guilds):
+        """Remplit le cache pour les serveurs donnés (au démarrage)"""
+        for guild in guilds:
+            self._lookup(guild)
+
+    def _lookup(self, guild: discord.Guild):
+        """Cherche le rôle par son nom et le met en cache"""
+        role = discord.utils.get(guild.roles, name=self.role_name)
+        if role is not None:
+            self._role_ids[guild.id] = role.id
+        return role
+
+    def get(self, guild: discord.Guild):
+        """Retourne le rôle de Noël du serveur, ou None s'il n'existe pas"""
+        role_id = self._role_ids.get(guild.id)
+        if role_id is not None:
+            role = guild.get_role(role_id)
+            if role is None:
+                # Rôle tout juste créé : garder celui retourné par create_role
+                created = self._created.get(guild.id)
+                if created is not None and created.id == role_id:
+                    return created
+            else:
+                self._created.pop(guild.id, None)
+                if role.name == self.role_name:
+                    return role
+            del self._role_ids[guild.id]
+        return self._lookup(guild)
+
+    async def get_or_create(self, guild: discord.Guild) -> discord.Role:
+        """
+        Récupère ou crée le rôle de Noël
+
+        Args:
+            guild: Le serveur Discord
+
+        Returns:
+            Le rôle de Noël
+        """
+        role = self.get(guild)
+        if role is not None:
+            return role
+
+        # Une seule création à la fois par serveur
+        task = self._pending.get(guild.id)
+        if task is None:
+            task = asyncio.create_task(self._create(guild))
+            self._pending[guild.id] = task
+            task.add_done_callback(lambda _: self._pending.pop(guild.id, None))
+        return await asyncio.shield(task)
+
+    async def _create(self, guild: discord.Guild) -> discord.Role:
+        """Crée le rôle de Noël et le met en cache"""
+        role = await guild.create_role(
+            name=self.role_name,
+            color=discord.Color.red(),
+            hoist=True,  # Afficher séparément dans la liste des membres
+            mentionable=True
+        )
+        self._role_ids[guild.id] = role.id
+        self._created[guild.id] = role
+        return role
+
+    def on_role_update(self, before: discord.Role, after: discord.Role):
+        """Met le cache à jour lorsqu'un rôle est renommé"""
+        if before.name != after.name:
+            self.invalidate(before)
+            if after.name == self.role_name:
+                self._role_ids[after.guild.id] = after.id
+
+    def invalidate(self, role: discord.Role):
+        """Retire un rôle du cache (supprimé ou renommé)"""
+        if self._role_ids.get(role.guild.id) == role.id:
+            del self._role_ids[role.guild.id]
+        created = self._created.get(role.guild.id)
+        if created is not None and created.id == role.id:
+            del self._created[role.guild.id]
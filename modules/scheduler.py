@@ -0,0 +1,114 @@
+"""
+Module de planification des échéances (apparitions et expirations des cadeaux)
+"""
+
+import asyncio
+import heapq
+import itertools
+
+
+class ScheduledCall:
+    """Échéance planifiée, annulable tant qu'elle n'a pas été déclenchée"""
+
+    __slots__ = ('deadline', 'callback', 'cancelled')
+
+    def __init__(self, deadline: float, callback):
+        self.deadline = deadline
+        self.callback = callback
+        self.cancelled = False
+
+    def cancel(self):
+        """Annule l'échéance (elle sera ignorée au moment de son déclenchement)"""
+        self.cancelled = True
+
+
+class DeadlineScheduler:
+    """
+    Planificateur central : toutes les échéances (apparitions, expirations...)
+    sont rangées dans un tas et servies par une seule tâche minuterie
+    """
+
+    def __init__(self):
+        self._heap = []  # Tas de (échéance, numéro d'ordre, ScheduledCall)
+        self._counter = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._runner = None
+        self._tasks = set()  # Callbacks asynchrones en cours d'exécution
+
+    @staticmethod
+    def time() -> float:
+        """Horloge monotone de la boucle d'événements"""
+        return asyncio.get_running_loop().time()
+
+    def call_at(self, deadline: float, callback) -> ScheduledCall:
+        """
+        Planifie un callback à une échéance absolue (horloge de la boucle)
+
+        Args:
+            deadline: L'échéance, au format de DeadlineScheduler.time()
+            callback: Fonction sans argument, qui peut retourner une coroutine
+
+        Returns:
+            L'échéance planifiée, annulable
+        """
+        call = ScheduledCall(deadline, callback)
+        heapq.heappush(self._heap, (deadline, next(self._counter), call))
+
+        # Réveiller la minuterie si cette échéance devient la plus proche
+        if self._heap[0][2] is call:
+            self._wakeup.set()
+        self._ensure_running()
+        return call
+
+    def call_later(self, delay: float, callback) -> ScheduledCall:
+        """Planifie un callback dans `delay` secondes"""
+        return self.call_at(self.time() + delay, callback)
+
+    def _ensure_running(self):
+        """Démarre la tâche minuterie si nécessaire"""
+        if self._runner is None or self._runner.done():
+            self._runner = asyncio.create_task(self._run())
+
+    async def _run(self):
+        """Boucle de la minuterie : déclenche les échéances arrivées à terme"""
+        while True:
+            now = self.time()
+            while self._heap and self._heap[0][0] <= now:
+                _, _, call = heapq.heappop(self._heap)
+                if not call.cancelled:
+                    self._fire(call)
+
+            timeout = self._heap[0][0] - now if self._heap else None
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def _fire(self, call: ScheduledCall):
+        """Exécute un callback sans bloquer la minuterie"""
+        try:
+            result = call.callback()
+        except Exception as e:
+            print(f"Erreur dans une tâche planifiée : {e}")
+            return
+
+        if asyncio.iscoroutine(result):
+            task = asyncio.create_task(result)
+            self._tasks.add(task)
+            task.add_done_callback(self._on_task_done)
+
+    def _on_task_done(self, task: asyncio.Task):
+        """Retire la tâche terminée et affiche son éventuelle erreur"""
+        self._tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            print(f"Erreur dans une tâche planifiée : {task.exception()}")
+
+    def close(self):
+        """Arrête la minuterie et annule les callbacks en cours"""
+        if self._runner is not None:
+            self._runner.cancel()
+            self._runner = None
+        for task in list(self._tasks):
+            task.cancel()
+        self._heap.clear()
@@ -0,0 +1,78 @@
+"""
+Module des paramètres du jeu par serveur
+
+Chaque serveur a ses propres paramètres (durée de vie des cadeaux,
+intervalles, probabilités, stocks, canal de logs), modifiables par ses
+administrateurs avec /config. Un paramètre jamais modifié prend la valeur
+par défaut de modules/config.py.
+
+Les paramètres sont enregistrés dans la base d'état et chargés en mémoire
+au démarrage : les lectures (à chaque cadeau) ne coûtent aucune requête.
+"""
+
+import modules.config as config
+from modules.state_store import StateStore
+
+# Paramètres modifiables : nom dans la base -> valeur par défaut dans modules/config.py
+DEFAULTS = {
+    'gift_lifetime': 'GIFT_LIFETIME',
+    'min_spawn_interval': 'MIN_SPAWN_INTERVAL',
+    'max_spawn_interval': 'MAX_SPAWN_INTERVAL',
+    'role_probability': 'ROLE_PROBABILITY',
+    'book_probability': 'BOOK_PROBABILITY',
+    'log_channel_id': 'LOG_CHANNEL_ID',
+    'max_roles': 'MAX_ROLES',
+    'max_books': 'MAX_BOOKS',
+}
+
+
+class GuildSettings:
+    """Paramètres d'un serveur (valeurs par défaut de modules/config.py pour ceux jamais modifiés)"""
+
+    __slots__ = tuple(DEFAULTS)
+
+    def __init__(self, values: dict = None):
+        values = values or {}
+        for name, default in DEFAULTS.items():
+            setattr(self, name, values.get(name, getattr(config, default)))
+
+
+class SettingsManager:
+    """Paramètres de tous les serveurs, chargés une fois au démarrage"""
+
+    def __init__(self, store: StateStore):
+        self.store = store
+        self._values = {}    # ID du serveur -> {nom: valeur} (paramètres modifiés seulement)
+        self._settings = {}  # ID du serveur -> GuildSettings
+
+    async def load(self) -> int:
+        """
+        Charge les paramètres modifiés depuis la base d'état
+
+        Returns:
+            Le nombre de serveurs ayant des paramètres modifiés
+        """
+        self._values = {}
+        self._settings = {}
+        for guild_id, name, value in await self.store.get_guild_settings():
+            if name in DEFAULTS:
+                self._values.setdefault(guild_id, {})[name] = value
+        return len(self._values)
+
+    def get(self, guild_id: int) -> GuildSettings:
+        """Retourne les paramètres d'un serveur"""
+        settings = self._settings.get(guild_id)
+        if settings is None:
+            settings = self._settings[guild_id] = GuildSettings(self._values.get(guild_id))
+        return settings
+
+    async def update(self, guild_id: int, **values):
+        """
+        Modifie des paramètres d'un serveur (enregistrés dans la base d'état)
+
+        Exemple :
+            await settings.update(guild.id, gift_lifetime=10, log_channel_id=channel.id)
+        """
+        await self.store.set_guild_settings(guild_id, values)
+        self._values.setdefault(guild_id, {}).update(values)
+        self._settings[guild_id] = GuildSettings(self._values[guild_id])
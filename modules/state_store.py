@@ -0,0 +1,444 @@
+"""
+Module de stockage de l'état du jeu (SQLite en mode WAL)
+
+Compteurs de stock, gagnants du livre, cadeaux actifs, historique des
+cadeaux récupérés, classement (agrégats par joueur) et paramètres des serveurs.
+Toutes les requêtes s'exécutent sur un thread dédié : les méthodes
+publiques sont des coroutines qui ne bloquent pas la boucle d'événements.
+
+Plusieurs processus du bot (un par groupe de shards) peuvent partager la
+même base : chaque réservation de stock et chaque gain du livre est une
+transaction SQLite atomique, le stock et les gagnants sont donc communs.
+"""
+
+import asyncio
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+import modules.config as config
+
+# Chemin de la base de données (partagée par tous les processus du bot)
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data")
+DB_FILE = config.STATE_DB_PATH or os.path.join(DATA_DIR, "state.db")
+
+# Types de récompenses limitées par un stock
+STOCK_ROLES = "roles"
+STOCK_BOOKS = "books"
+
+# Résultats de try_award_book
+AWARD_GRANTED = "granted"
+AWARD_ALREADY_WON = "already_won"
+AWARD_NO_STOCK = "no_stock"
+
+# Migrations du schéma (l'index + 1 correspond à PRAGMA user_version)
+MIGRATIONS = [
+    """
+    CREATE TABLE stock (
+        name TEXT PRIMARY KEY,
+        given INTEGER NOT NULL DEFAULT 0
+    );
+    INSERT INTO stock (name, given) VALUES ('roles', 0), ('books', 0);
+
+    CREATE TABLE book_winners (
+        user_id INTEGER PRIMARY KEY,
+        won_at REAL NOT NULL
+    );
+
+    CREATE TABLE claims (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        guild_id INTEGER,
+        channel_id INTEGER,
+        user_id INTEGER NOT NULL,
+        outcome TEXT NOT NULL,
+        claimed_at REAL NOT NULL
+    );
+    CREATE INDEX idx_claims_user ON claims (user_id);
+    CREATE INDEX idx_claims_guild_time ON claims (guild_id, claimed_at);
+    """,
+    """
+    ALTER TABLE claims ADD COLUMN ack_ms REAL;
+    """,
+    """
+    ALTER TABLE stock RENAME TO stock_global;
+    CREATE TABLE stock (
+        guild_id INTEGER NOT NULL,
+        name TEXT NOT NULL,
+        given INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (guild_id, name)
+    );
+    -- Les anciens compteurs globaux sont conservés sous le serveur 0
+    INSERT INTO stock (guild_id, name, given) SELECT 0, name, given FROM stock_global;
+    DROP TABLE stock_global;
+    """,
+    """
+    CREATE TABLE gifts (
+        gift_id INTEGER PRIMARY KEY,
+        guild_id INTEGER NOT NULL,
+        channel_id INTEGER NOT NULL,
+        message_id INTEGER NOT NULL,
+        expires_at REAL NOT NULL
+    );
+    """,
+    """
+    CREATE TABLE leaderboard (
+        guild_id INTEGER NOT NULL,
+        user_id INTEGER NOT NULL,
+        claims INTEGER NOT NULL DEFAULT 0,
+        wins INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (guild_id, user_id)
+    );
+    CREATE INDEX idx_leaderboard_claims ON leaderboard (guild_id, claims DESC);
+    CREATE INDEX idx_leaderboard_wins ON leaderboard (guild_id, wins DESC);
+    -- Agrégats calculés une seule fois à partir de l'historique existant
+    INSERT INTO leaderboard (guild_id, user_id, claims, wins)
+    SELECT guild_id, user_id, COUNT(*), SUM(outcome IN ('role', 'book'))
+    FROM claims WHERE guild_id IS NOT NULL GROUP BY guild_id, user_id;
+    """,
+    """
+    -- Les IDs de cadeaux ne sont uniques qu'au sein d'un processus : clé par serveur
+    ALTER TABLE gifts RENAME TO gifts_by_id;
+    CREATE TABLE gifts (
+        guild_id INTEGER NOT NULL,
+        gift_id INTEGER NOT NULL,
+        channel_id INTEGER NOT NULL,
+        message_id INTEGER NOT NULL,
+        expires_at REAL NOT NULL,
+        PRIMARY KEY (guild_id, gift_id)
+    );
+    INSERT INTO gifts (guild_id, gift_id, channel_id, message_id, expires_at)
+    SELECT guild_id, gift_id, channel_id, message_id, expires_at FROM gifts_by_id;
+    DROP TABLE gifts_by_id;
+    """,
+    """
+    CREATE TABLE guild_settings (
+        guild_id INTEGER NOT NULL,
+        name TEXT NOT NULL,
+        value NOT NULL,
+        PRIMARY KEY (guild_id, name)
+    );
+    """,
+]
+
+# Résultats d'un cadeau récupéré comptés comme des gains dans le classement
+WIN_OUTCOMES = ("role", "book")
+
+# Classements disponibles (colonne de tri de la table leaderboard)
+BOARD_CLAIMS = "claims"
+BOARD_WINS = "wins"
+
+
+class StateStore:
+    """Accès asynchrone à la base SQLite de l'état du jeu"""
+
+    def __init__(self, path: str = DB_FILE):
+        self.path = path
+        self._conn = None
+        # Un seul thread : les requêtes sont sérialisées, sans verrou côté Python
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="state-store")
+
+    async def _run(self, func, *args):
+        """Exécute une fonction synchrone sur le thread de la base"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    # ==================== OUVERTURE / FERMETURE ====================
+
+    async def open(self):
+        """Ouvre la base et applique les migrations manquantes"""
+        await self._run(self._open_sync)
+
+    def _open_sync(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+
+        # isolation_level=None : chaque requête est sa propre transaction
+        conn = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=5000")
+
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        for index in range(version, len(MIGRATIONS)):
+            conn.executescript(
+                "BEGIN;\n" + MIGRATIONS[index] + f"\nPRAGMA user_version = {index + 1};\nCOMMIT;"
+            )
+
+        self._conn = conn
+
+    async def close(self):
+        """Ferme la base (à l'arrêt du bot)"""
+        if self._conn is not None:
+            await self._run(self._conn.close)
+            self._conn = None
+        self._executor.shutdown(wait=True)
+
+    # ==================== STOCK (PAR SERVEUR) ====================
+
+    async def try_take_stock(self, guild_id: int, name: str, limit: int) -> bool:
+        """
+        Réserve une unité de stock d'un serveur de façon atomique
+
+        Args:
+            guild_id: L'ID du serveur
+            name: STOCK_ROLES ou STOCK_BOOKS
+            limit: Stock maximum (-1 = illimité)
+
+        Returns:
+            True si une unité a été réservée, False si le stock est épuisé
+        """
+        return await self._run(self._try_take_stock_sync, guild_id, name, limit)
+
+    def _try_take_stock_sync(self, guild_id, name, limit):
+        # Une seule requête : création du compteur ou incrément sous condition
+        cursor = self._conn.execute(
+            """
+            INSERT INTO stock (guild_id, name, given)
+            SELECT ?, ?, 1 WHERE ? = -1 OR ? > 0
+            ON CONFLICT (guild_id, name) DO UPDATE SET given = given + 1
+            WHERE ? = -1 OR given < ?
+            """,
+            (guild_id, name, limit, limit, limit, limit)
+        )
+        return cursor.rowcount == 1
+
+    async def try_award_book(self, guild_id: int, user_id: int, limit: int) -> str:
+        """
+        Attribue le livre de façon atomique : gagnant unique et stock réservé ensemble
+
+        Le joueur peut avoir gagné le livre depuis un autre processus du bot :
+        la base fait foi, pas l'index en mémoire.
+
+        Args:
+            guild_id: L'ID du serveur
+            user_id: L'ID du joueur
+            limit: Stock maximum de livres (-1 = illimité)
+
+        Returns:
+            AWARD_GRANTED, AWARD_ALREADY_WON ou AWARD_NO_STOCK
+        """
+        return await self._run(self._try_award_book_sync, guild_id, user_id, limit)
+
+    def _try_award_book_sync(self, guild_id, user_id, limit):
+        # IMMEDIATE : le verrou d'écriture est pris d'emblée (pas d'interblocage entre processus)
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO book_winners (user_id, won_at) VALUES (?, ?)",
+                (user_id, time.time())
+            )
+            if cursor.rowcount != 1:
+                result = AWARD_ALREADY_WON
+            elif not self._try_take_stock_sync(guild_id, STOCK_BOOKS, limit):
+                result = AWARD_NO_STOCK
+            else:
+                result = AWARD_GRANTED
+            self._conn.execute("COMMIT" if result == AWARD_GRANTED else "ROLLBACK")
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        return result
+
+    async def release_stock(self, guild_id: int, name: str):
+        """Rend une unité réservée (ex : le rôle n'a pas pu être attribué)"""
+        await self._run(
+            self._execute,
+            "UPDATE stock SET given = MAX(given - 1, 0) WHERE guild_id = ? AND name = ?",
+            (guild_id, name)
+        )
+
+    async def get_stock(self, guild_id: int) -> dict:
+        """Retourne le nombre de récompenses distribuées sur un serveur, par type"""
+        rows = await self._run(
+            self._fetchall,
+            "SELECT name, given FROM stock WHERE guild_id = ?",
+            (guild_id,)
+        )
+        stock = {STOCK_ROLES: 0, STOCK_BOOKS: 0}
+        stock.update(rows)
+        return stock
+
+    async def reset_stock(self, guild_id: int) -> dict:
+        """
+        Remet les compteurs d'un serveur à zéro
+
+        Returns:
+            Les compteurs avant la remise à zéro
+        """
+        return await self._run(self._reset_stock_sync, guild_id)
+
+    def _reset_stock_sync(self, guild_id):
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            old = {STOCK_ROLES: 0, STOCK_BOOKS: 0}
+            old.update(self._conn.execute(
+                "SELECT name, given FROM stock WHERE guild_id = ?", (guild_id,)
+            ).fetchall())
+            self._conn.execute("UPDATE stock SET given = 0 WHERE guild_id = ?", (guild_id,))
+            self._conn.execute("COMMIT")
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        return old
+
+    # ==================== GAGNANTS DU LIVRE ====================
+
+    async def get_book_winners(self) -> set:
+        """Retourne l'ensemble des IDs des gagnants du livre"""
+        rows = await self._run(self._fetchall, "SELECT user_id FROM book_winners", ())
+        return {row[0] for row in rows}
+
+    async def add_book_winners(self, user_ids) -> int:
+        """
+        Enregistre des gagnants du livre (les doublons sont ignorés)
+
+        Returns:
+            Le nombre de gagnants réellement ajoutés
+        """
+        return await self._run(self._add_book_winners_sync, list(user_ids))
+
+    def _add_book_winners_sync(self, user_ids):
+        now = time.time()
+        before = self._conn.total_changes
+        self._conn.execute("BEGIN")
+        try:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO book_winners (user_id, won_at) VALUES (?, ?)",
+                [(user_id, now) for user_id in user_ids]
+            )
+            self._conn.execute("COMMIT")
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        return self._conn.total_changes - before
+
+    # ==================== CADEAUX ACTIFS ====================
+
+    async def add_gift(self, gift_id: int, guild_id: int, channel_id: int, message_id: int, expires_at: float):
+        """
+        Enregistre un cadeau affiché (pour le retrouver après un redémarrage)
+
+        Args:
+            expires_at: Instant d'expiration (horodatage time.time())
+        """
+        await self._run(
+            self._execute,
+            "INSERT INTO gifts (guild_id, gift_id, channel_id, message_id, expires_at) VALUES (?, ?, ?, ?, ?)",
+            (guild_id, gift_id, channel_id, message_id, expires_at)
+        )
+
+    async def remove_gift(self, guild_id: int, gift_id: int):
+        """Retire un cadeau récupéré ou expiré"""
+        await self._run(self._execute, "DELETE FROM gifts WHERE guild_id = ? AND gift_id = ?", (guild_id, gift_id))
+
+    async def get_active_gifts(self) -> list:
+        """
+        Retourne les cadeaux encore valides (les cadeaux expirés sont supprimés)
+
+        Returns:
+            Liste de (gift_id, guild_id, channel_id, message_id, expires_at)
+        """
+        return await self._run(self._get_active_gifts_sync, time.time())
+
+    def _get_active_gifts_sync(self, now):
+        self._conn.execute("DELETE FROM gifts WHERE expires_at <= ?", (now,))
+        return self._conn.execute(
+            "SELECT gift_id, guild_id, channel_id, message_id, expires_at FROM gifts"
+        ).fetchall()
+
+    # ==================== HISTORIQUE ====================
+
+    async def record_claim(self, guild_id: int, channel_id: int, user_id: int, outcome: str, ack_ms: float = None) -> tuple:
+        """
+        Ajoute un cadeau récupéré à l'historique et met à jour le classement
+
+        Args:
+            ack_ms: Délai entre le clic et l'accusé de réception (ms)
+
+        Returns:
+            Les totaux du joueur sur ce serveur : (cadeaux récupérés, gains)
+        """
+        return await self._run(self._record_claim_sync, guild_id, channel_id, user_id, outcome, ack_ms)
+
+    def _record_claim_sync(self, guild_id, channel_id, user_id, outcome, ack_ms):
+        win = 1 if outcome in WIN_OUTCOMES else 0
+        self._conn.execute("BEGIN")
+        try:
+            self._conn.execute(
+                "INSERT INTO claims (guild_id, channel_id, user_id, outcome, claimed_at, ack_ms) VALUES (?, ?, ?, ?, ?, ?)",
+                (guild_id, channel_id, user_id, outcome, time.time(), ack_ms)
+            )
+            # Agrégat incrémental : pas de parcours de l'historique
+            self._conn.execute(
+                """
+                INSERT INTO leaderboard (guild_id, user_id, claims, wins) VALUES (?, ?, 1, ?)
+                ON CONFLICT (guild_id, user_id) DO UPDATE SET claims = claims + 1, wins = wins + excluded.wins
+                """,
+                (guild_id, user_id, win)
+            )
+            totals = self._conn.execute(
+                "SELECT claims, wins FROM leaderboard WHERE guild_id = ? AND user_id = ?",
+                (guild_id, user_id)
+            ).fetchone()
+            self._conn.execute("COMMIT")
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        return totals
+
+    # ==================== CLASSEMENT ====================
+
+    async def get_leaderboard(self, guild_id: int, board: str, limit: int) -> list:
+        """
+        Retourne les meilleurs joueurs d'un serveur (lecture par l'index, sans parcours de l'historique)
+
+        Args:
+            board: BOARD_CLAIMS ou BOARD_WINS
+            limit: Nombre de joueurs
+
+        Returns:
+            Liste de (user_id, claims, wins), du premier au dernier
+        """
+        if board not in (BOARD_CLAIMS, BOARD_WINS):
+            raise ValueError(f"Classement inconnu : {board}")
+        other = BOARD_WINS if board == BOARD_CLAIMS else BOARD_CLAIMS
+        return await self._run(
+            self._fetchall,
+            f"SELECT user_id, claims, wins FROM leaderboard WHERE guild_id = ? AND {board} > 0 "
+            f"ORDER BY {board} DESC, {other} DESC, user_id LIMIT ?",
+            (guild_id, limit)
+        )
+
+    # ==================== PARAMÈTRES DES SERVEURS ====================
+
+    async def get_guild_settings(self) -> list:
+        """
+        Retourne les paramètres modifiés de tous les serveurs
+
+        Returns:
+            Liste de (guild_id, nom, valeur)
+        """
+        return await self._run(self._fetchall, "SELECT guild_id, name, value FROM guild_settings", ())
+
+    async def set_guild_settings(self, guild_id: int, values: dict):
+        """Enregistre des paramètres d'un serveur (remplace les valeurs précédentes)"""
+        await self._run(self._set_guild_settings_sync, guild_id, list(values.items()))
+
+    def _set_guild_settings_sync(self, guild_id, items):
+        self._conn.execute("BEGIN")
+        try:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO guild_settings (guild_id, name, value) VALUES (?, ?, ?)",
+                [(guild_id, name, value) for name, value in items]
+            )
+            self._conn.execute("COMMIT")
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+
+    # ==================== UTILITAIRES ====================
+
+    def _execute(self, sql, params):
+        self._conn.execute(sql, params)
+
+    def _fetchall(self, sql, params):
+        return self._conn.execute(sql, params).fetchall()
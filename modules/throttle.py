@@ -0,0 +1,64 @@
+"""
+Module de limitation des clics par utilisateur (seau à jetons)
+"""
+
+import time
+from collections import OrderedDict
+import modules.config as config
+
+
+class ClickThrottle:
+    """
+    Seau à jetons par utilisateur, dans une structure bornée et auto-expirante
+
+    Chaque utilisateur dispose de `burst` jetons, rechargés à `rate` jetons
+    par seconde ; un clic consomme un jeton. Un seau inutilisé pendant
+    burst / rate secondes est de nouveau plein : il est alors oublié.
+    Au-delà de `max_users` seaux, les moins récemment utilisés sont oubliés.
+    """
+
+    def __init__(self, rate: float = None, burst: int = None, max_users: int = None):
+        self.rate = rate or config.CLICK_RATE
+        self.burst = burst or config.CLICK_BURST
+        self.max_users = max_users or config.CLICK_THROTTLE_MAX_USERS
+        self.ttl = self.burst / self.rate
+        self._buckets = OrderedDict()  # ID utilisateur -> [jetons, dernier clic], du plus ancien au plus récent
+        self.shed = 0  # Clics rejetés depuis le démarrage
+
+    def allow(self, user_id: int, now: float = None) -> bool:
+        """
+        Consomme un jeton pour ce clic
+
+        Returns:
+            False si l'utilisateur clique trop vite (clic à ignorer)
+        """
+        now = time.monotonic() if now is None else now
+        self._expire(now)
+
+        entry = self._buckets.pop(user_id, None)
+        if entry is None:
+            tokens = self.burst
+        else:
+            tokens = min(self.burst, entry[0] + (now - entry[1]) * self.rate)
+
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        else:
+            self.shed += 1
+
+        self._buckets[user_id] = [tokens, now]
+        if len(self._buckets) > self.max_users:
+            self._buckets.popitem(last=False)
+        return allowed
+
+    def _expire(self, now: float):
+        """Oublie les seaux redevenus pleins (les plus anciens sont en tête)"""
+        while self._buckets:
+            _, (_, last) = next(iter(self._buckets.items()))
+            if now - last < self.ttl:
+                break
+            self._buckets.popitem(last=False)
+
+    def __len__(self):
+        return len(self._buckets)
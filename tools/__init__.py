@@ -0,0 +1 @@
+# Outils hors ligne (simulation, bancs d'essai)
@@ -0,0 +1,282 @@
+"""
+Banc d'essai des réclamations simultanées d'un cadeau (hors ligne)
+
+Fait apparaître des cadeaux avec le vrai GiftManager, puis simule des
+rafales de clics concurrents sur le bouton GiftButton (routé par custom_id,
+comme le fait discord.py). Les appels à
+Discord passent par la doublure locale (tools/fake_discord.py), avec une
+latence et des réponses 429 configurables. Le tirage au sort est le vrai
+(LotteryManager), sur une base d'état temporaire.
+
+Mesures :
+  - latence d'accusé de réception de chaque clic (p50 / p99) ;
+  - délai jusqu'au message final (refus, ou résultat du tirage pour le gagnant) ;
+  - répartition des clics (gagnant, trop tard, cadeau disparu, ignoré) ;
+  - appels à l'API par réclamation, par route ;
+  - appels admis ou différés par la file à priorités (ApiScheduler), par priorité.
+
+Usage (depuis la racine du projet) :
+    python -m tools.bench_claims --clicks 500 --latency-ms 80 --rate-limit-ratio 0.02
+    python -m tools.bench_claims --clicks 500 --no-api-scheduler   # Sans la file, pour comparer
+"""
+
+import argparse
+import asyncio
+import os
+import math
+import random
+import re
+import shutil
+import statistics
+import sys
+import tempfile
+
+import modules.metrics as metrics
+from modules.api_scheduler import ApiScheduler, PRIORITY_NAMES
+from modules.books import BookManager
+from modules.gift_manager import GiftManager, GiftButton, GIFT_CUSTOM_ID_TEMPLATE
+from modules.journal import ClaimJournal
+from modules.leaderboard import Leaderboard
+from modules.log_dispatcher import LogDispatcher
+from modules.lottery import LotteryManager
+from modules.reaper import MessageReaper
+from modules.roles import RoleCache
+from modules.throttle import ClickThrottle
+from modules.scheduler import DeadlineScheduler
+from modules.settings import SettingsManager
+from modules.state_store import StateStore
+from tools.fake_discord import FakeHTTP, FakeGuild, FakeInteraction
+
+
+class FakeBot:
+    """Le strict nécessaire de ChristmasBot pour GiftManager et LotteryManager"""
+
+    def __init__(self, http: FakeHTTP, guild: FakeGuild, store: StateStore, data_dir: str):
+        self.http = http
+        self.guild = guild
+        self.scheduler = DeadlineScheduler()
+        self.reaper = MessageReaper(http, os.path.join(data_dir, "pending_deletions.json"))
+        self.journal = ClaimJournal(os.path.join(data_dir, "journal.jsonl"),
+                                    os.path.join(data_dir, "journal_snapshot.json"))
+        self.store = store
+        self.api_scheduler = None
+        self.book_manager = BookManager(store)
+        self.settings = SettingsManager(store)
+        self.leaderboard = Leaderboard(store)
+        self.role_cache = RoleCache()
+        self.click_throttle = ClickThrottle()
+        self.log_dispatcher = LogDispatcher(self)
+        self.lottery = None
+        self.gift_manager = None
+
+    def get_gift_manager(self, guild):
+        return self.gift_manager
+
+    def get_channel(self, channel_id: int):
+        return self.guild.get_channel(channel_id)
+
+    async def resolve_member(self, guild, user_id: int):
+        member = guild.get_member(user_id)
+        if member is None:
+            member = await guild.fetch_member(user_id)
+        return member
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Arguments de la ligne de commande"""
+    parser = argparse.ArgumentParser(description="Banc d'essai des réclamations simultanées")
+    parser.add_argument("--clicks", type=int, default=500, help="Clics par cadeau")
+    parser.add_argument("--repeat", type=int, default=1,
+                        help="Clics par utilisateur (> 1 pour simuler des clics répétés ou scriptés)")
+    parser.add_argument("--rounds", type=int, default=5, help="Nombre de cadeaux (rafales successives)")
+    parser.add_argument("--spread-ms", type=float, default=1000,
+                        help="Fenêtre sur laquelle les clics d'une rafale sont répartis")
+    parser.add_argument("--latency-ms", type=float, default=80, help="Latence moyenne d'un appel à l'API")
+    parser.add_argument("--jitter-ms", type=float, default=40, help="Variation de la latence (+/-)")
+    parser.add_argument("--rate-limit-ratio", type=float, default=0.0,
+                        help="Probabilité qu'un appel reçoive une réponse 429")
+    parser.add_argument("--retry-after-ms", type=float, default=500, help="Attente imposée par un 429")
+    parser.add_argument("--bucket-limit", type=int, default=5, help="Appels autorisés par bucket sur une fenêtre")
+    parser.add_argument("--bucket-reset-ms", type=float, default=5000, help="Durée de la fenêtre d'un bucket")
+    parser.add_argument("--round-timeout", type=float, default=30, help="Durée maximale d'une rafale (s)")
+    parser.add_argument("--logs", action="store_true", help="Activer l'envoi des logs vers un salon simulé")
+    parser.add_argument("--no-api-scheduler", dest="api_scheduler", action="store_false",
+                        help="Appels à l'API sans la file à priorités (ApiScheduler)")
+    parser.add_argument("--seed", type=int, default=None)
+    return parser
+
+
+def percentiles(values, *points):
+    """Retourne les centiles demandés (0 si aucune valeur)"""
+    if not values:
+        return [0.0] * len(points)
+    if len(values) == 1:
+        return [values[0]] * len(points)
+    cuts = statistics.quantiles(values, n=100, method='inclusive')
+    return [cuts[p - 1] for p in points]
+
+
+async def run_round(bot: FakeBot, manager: GiftManager, channel, members, args):
+    """
+    Fait apparaître un cadeau et simule une rafale de clics
+
+    Returns:
+        Les interactions de la rafale
+    """
+    await manager.spawn_gift(channel)
+    message = channel.messages[-1]
+    button = message.view.children[0].item
+    interactions = []
+
+    async def click(user, delay):
+        await asyncio.sleep(delay)
+        interaction = FakeInteraction(message, user, bot.http, client=bot)
+        interactions.append(interaction)
+        # Routage par custom_id, comme pour un bouton dynamique de discord.py
+        match = re.fullmatch(GIFT_CUSTOM_ID_TEMPLATE, button.custom_id)
+        item = await GiftButton.from_custom_id(interaction, button, match)
+        await item.callback(interaction)
+
+    users = random.sample(members, math.ceil(args.clicks / args.repeat))
+    tasks = [
+        asyncio.create_task(click(user, random.uniform(0, args.spread_ms / 1000)))
+        for user in (users * args.repeat)[:args.clicks]
+    ]
+
+    # Attendre la fin du traitement de chaque clic
+    done, pending = await asyncio.wait(tasks, timeout=args.round_timeout)
+    if pending:
+        print(f"⚠️ Rafale interrompue après {args.round_timeout:.0f}s")
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+    return interactions
+
+
+async def bench(args, http: FakeHTTP):
+    """
+    Exécute toutes les rafales
+
+    Returns:
+        Toutes les interactions
+    """
+    guild = FakeGuild(http)
+    channel = guild.add_channel()
+    members = [guild.add_member() for _ in range(math.ceil(args.clicks / args.repeat))]
+
+    data_dir = tempfile.mkdtemp(prefix="bench-claims-")
+    store = StateStore(os.path.join(data_dir, "state.db"))
+    await store.open()
+    bot = FakeBot(http, guild, store, data_dir)
+    if args.api_scheduler:
+        bot.api_scheduler = ApiScheduler()
+        bot.api_scheduler.install(http)
+    await bot.reaper.start()
+    await bot.journal.open()
+    await bot.book_manager.load()
+    await bot.settings.load()
+    if args.logs:
+        await bot.settings.update(guild.id, log_channel_id=guild.add_channel().id)
+    bot.log_dispatcher.start()
+    bot.lottery = LotteryManager(bot)
+    manager = GiftManager(bot, guild.id)
+    bot.gift_manager = manager
+
+    interactions = []
+    http.reset()
+    try:
+        for _ in range(args.rounds):
+            interactions.extend(await run_round(bot, manager, channel, members, args))
+    finally:
+        await bot.log_dispatcher.close()
+        await bot.reaper.close()
+        if bot.api_scheduler is not None:
+            bot.api_scheduler.close()
+        await bot.journal.close()
+        bot.scheduler.close()
+        await store.close()
+        shutil.rmtree(data_dir, ignore_errors=True)
+    return interactions
+
+
+def report(args, http: FakeHTTP, interactions):
+    """Affiche les mesures de toutes les rafales"""
+    def ms(interaction, attribute):
+        value = getattr(interaction, attribute)
+        return (value - interaction.clicked_at) * 1000 if value is not None else None
+
+    acked = [ms(i, 'acked_at') for i in interactions if i.acked_at is not None]
+    losers = [ms(i, 'finished_at') for i in interactions
+              if i.finished_at is not None and not i.response.deferred]
+    winners = [ms(i, 'finished_at') for i in interactions
+               if i.finished_at is not None and i.response.deferred]
+    unanswered = len(interactions) - len(acked)
+
+    print(f"🎁 {args.rounds} cadeau(x) x {args.clicks} clics répartis sur {args.spread_ms:.0f} ms")
+    print(f"   Latence API {args.latency_ms:.0f}±{args.jitter_ms:.0f} ms, "
+          f"429 : {args.rate_limit_ratio:.1%} (retry_after {args.retry_after_ms:.0f} ms), "
+          f"{args.bucket_limit} appels par bucket toutes les {args.bucket_reset_ms:.0f} ms")
+    print()
+
+    rows = [
+        ("Accusé de réception (tous les clics)", acked),
+        ("Refus « Trop tard » (perdants)", losers),
+        ("Résultat du tirage (gagnants)", winners),
+    ]
+    print("⏱️ Latences (ms) :")
+    for label, values in rows:
+        p50, p99 = percentiles(values, 50, 99)
+        worst = max(values) if values else 0.0
+        print(f"  {label:<40} n={len(values):<6} p50 {p50:8.1f} | p99 {p99:8.1f} | max {worst:8.1f}")
+    print()
+
+    clicks = {result: int(metrics.CLAIM_CLICKS.value(result=result))
+              for result in ("won", "late", "gone", "throttled")}
+    print(f"🖱️ Clics : {clicks['won']} gagnant(s), {clicks['late']} trop tard, "
+          f"{clicks['gone']} après la disparition du cadeau, {clicks['throttled']} ignoré(s) (limitation)")
+    if unanswered > clicks['throttled']:
+        print(f"  ⚠️ {unanswered - clicks['throttled']} clic(s) sans réponse à la fin de leur rafale")
+    print()
+
+    total = http.total_calls()
+    claims = max(len(interactions), 1)
+    print(f"📡 Appels à l'API : {total} ({total / claims:.2f} par réclamation), "
+          f"dont {sum(http.rate_limited.values())} réponse(s) 429")
+    for route, count in sorted(http.calls.items(), key=lambda item: -item[1]):
+        limited = http.rate_limited.get(route, 0)
+        suffix = f" (429 : {limited})" if limited else ""
+        print(f"  {count / claims:6.3f} / réclamation  {route}{suffix}")
+    print()
+
+    if not args.api_scheduler:
+        print("🚦 File à priorités désactivée (--no-api-scheduler)")
+        return
+    print("🚦 File à priorités (appels du bot, hors réponses aux interactions) :")
+    for priority in PRIORITY_NAMES.values():
+        admitted = int(metrics.API_SCHEDULED.value(priority=priority, result="admitted"))
+        deferred = int(metrics.API_SCHEDULED.value(priority=priority, result="deferred"))
+        if not admitted and not deferred:
+            continue
+        waited = metrics.API_QUEUE_WAIT.count(priority=priority)
+        mean = metrics.API_QUEUE_WAIT.sum(priority=priority) / waited * 1000 if waited else 0.0
+        print(f"  {priority:<12} {admitted:6} admis | {deferred:6} différé(s) | attente moyenne {mean:8.1f} ms")
+
+
+def main(argv=None):
+    """Point d'entrée du banc d'essai"""
+    args = build_parser().parse_args(argv)
+    if args.clicks < 1 or args.rounds < 1:
+        print("❌ Il faut au moins un clic et un cadeau")
+        return 1
+    if args.seed is not None:
+        random.seed(args.seed)
+
+    http = FakeHTTP(args.latency_ms, args.jitter_ms, args.rate_limit_ratio, args.retry_after_ms,
+                    args.bucket_limit, args.bucket_reset_ms, seed=args.seed)
+    interactions = asyncio.run(bench(args, http))
+    report(args, http, interactions)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,178 @@
+"""
+Banc d'essai du stock partagé entre plusieurs processus du bot (hors ligne)
+
+Lance N processus qui réservent en même temps des rôles et attribuent des
+livres sur la même base d'état (StateStore, fichier SQLite local), comme
+le feraient plusieurs processus de shards du bot.
+
+Vérifications :
+  - le stock n'est jamais dépassé, tous processus confondus ;
+  - chaque gagnant du livre est unique, tous processus confondus.
+
+Mesures :
+  - réservations par seconde (total et par processus) ;
+  - latence d'une réservation (p50 / p99).
+
+Usage (depuis la racine du projet) :
+    python -m tools.bench_ledger --processes 4 --reservations 2000 --limit 5000
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+from modules.state_store import StateStore, STOCK_ROLES, STOCK_BOOKS, AWARD_GRANTED
+
+# Serveur utilisé par le banc d'essai
+GUILD_ID = 1
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Arguments de la ligne de commande"""
+    parser = argparse.ArgumentParser(description="Banc d'essai du stock partagé entre processus")
+    parser.add_argument("--processes", type=int, default=4, help="Nombre de processus")
+    parser.add_argument("--reservations", type=int, default=1000, help="Réservations de rôle par processus")
+    parser.add_argument("--limit", type=int, default=-1, help="Stock de rôles (-1 = illimité)")
+    parser.add_argument("--awards", type=int, default=200, help="Tentatives d'attribution du livre par processus")
+    parser.add_argument("--book-limit", type=int, default=50, help="Stock de livres (-1 = illimité)")
+    parser.add_argument("--players", type=int, default=500, help="Nombre de joueurs (gagnants du livre possibles)")
+    parser.add_argument("--db", help="Base à utiliser (par défaut : base temporaire)")
+    parser.add_argument("--seed", type=int, help="Graine aléatoire")
+    return parser
+
+
+async def run_worker(path: str, args, worker: int) -> dict:
+    """Réservations d'un processus, une à la fois (comme les clics gagnants d'un shard)"""
+    rng = random.Random(None if args.seed is None else args.seed + worker)
+    store = StateStore(path)
+    await store.open()
+    latencies = []
+    granted = 0
+    winners = []
+    try:
+        for _ in range(args.reservations):
+            t0 = time.perf_counter()
+            if await store.try_take_stock(GUILD_ID, STOCK_ROLES, args.limit):
+                granted += 1
+            latencies.append(time.perf_counter() - t0)
+        for _ in range(args.awards):
+            user_id = rng.randint(1, args.players)
+            t0 = time.perf_counter()
+            if await store.try_award_book(GUILD_ID, user_id, args.book_limit) == AWARD_GRANTED:
+                winners.append(user_id)
+            latencies.append(time.perf_counter() - t0)
+    finally:
+        await store.close()
+    return {'granted': granted, 'winners': winners, 'latencies': latencies}
+
+
+def worker_main(path: str, args, worker: int, ready, results):
+    """Processus de test : attend le départ commun puis envoie ses résultats"""
+    ready.wait()
+    results.put((worker, asyncio.run(run_worker(path, args, worker))))
+
+
+def percentile(values, q: float) -> float:
+    if len(values) < 2:
+        return values[0] if values else 0.0
+    return statistics.quantiles(values, n=100, method='inclusive')[int(q) - 1]
+
+
+def main(argv=None):
+    """Point d'entrée du banc d'essai"""
+    args = build_parser().parse_args(argv)
+    if args.processes < 1:
+        print("❌ Il faut au moins un processus")
+        return 1
+
+    data_dir = None
+    path = args.db
+    if path is None:
+        data_dir = tempfile.mkdtemp(prefix="bench-ledger-")
+        path = os.path.join(data_dir, "state.db")
+
+    # Migrations appliquées une fois avant le départ
+    async def prepare():
+        store = StateStore(path)
+        await store.open()
+        await store.reset_stock(GUILD_ID)
+        await store.close()
+    asyncio.run(prepare())
+
+    # spawn : processus neufs, sans état hérité (threads, connexions SQLite)
+    context = multiprocessing.get_context("spawn")
+    ready = context.Barrier(args.processes + 1)  # Départ commun, une fois tous les processus lancés
+    results = context.Queue()
+    processes = [
+        context.Process(target=worker_main, args=(path, args, worker, ready, results))
+        for worker in range(args.processes)
+    ]
+    try:
+        for process in processes:
+            process.start()
+        ready.wait()
+        start = time.perf_counter()
+        outcomes = dict(results.get() for _ in processes)
+        wall = time.perf_counter() - start
+        for process in processes:
+            process.join()
+
+        async def final_state():
+            store = StateStore(path)
+            await store.open()
+            try:
+                return await store.get_stock(GUILD_ID), await store.get_book_winners()
+            finally:
+                await store.close()
+        stock, book_winners = asyncio.run(final_state())
+    finally:
+        if data_dir is not None:
+            shutil.rmtree(data_dir, ignore_errors=True)
+
+    # ==================== RAPPORT ====================
+
+    operations = args.processes * (args.reservations + args.awards)
+    latencies = sorted(l * 1000 for outcome in outcomes.values() for l in outcome['latencies'])
+    granted = sum(outcome['granted'] for outcome in outcomes.values())
+    winners = [user_id for outcome in outcomes.values() for user_id in outcome['winners']]
+
+    print(f"🗄️ {args.processes} processus x ({args.reservations} réservations + {args.awards} livres) sur {path}")
+    print(f"\n⏱️ Débit : {operations / wall:,.0f} opérations/s au total "
+          f"({operations / wall / args.processes:,.0f} par processus)")
+    print(f"   Latence : p50 {percentile(latencies, 50):.2f} ms | p99 {percentile(latencies, 99):.2f} ms "
+          f"| max {latencies[-1]:.2f} ms")
+
+    errors = []
+    expected = args.processes * args.reservations
+    if args.limit != -1:
+        expected = min(expected, args.limit)
+    if granted != expected or stock[STOCK_ROLES] != granted:
+        errors.append(f"rôles : {granted} réservés, {stock[STOCK_ROLES]} en base, {expected} attendus")
+    if len(winners) != len(set(winners)):
+        errors.append(f"livre : {len(winners) - len(set(winners))} gagnant(s) en double")
+    # La base peut déjà contenir des gagnants (--db) : ceux du test doivent y être
+    if not set(winners) <= book_winners or stock[STOCK_BOOKS] != len(winners):
+        errors.append(f"livre : {len(winners)} attribués, {len(book_winners)} gagnants et {stock[STOCK_BOOKS]} livres en base")
+    if args.book_limit != -1 and len(winners) > args.book_limit:
+        errors.append(f"livre : {len(winners)} attribués pour un stock de {args.book_limit}")
+
+    print(f"\n📊 Rôles réservés : {granted} (stock {'∞' if args.limit == -1 else args.limit})")
+    print(f"   Livres attribués : {len(winners)} à {len(set(winners))} joueur(s) distinct(s) "
+          f"(stock {'∞' if args.book_limit == -1 else args.book_limit})")
+    if errors:
+        for error in errors:
+            print(f"❌ {error}")
+        return 1
+    print("✅ Stock et gagnants cohérents entre les processus")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,325 @@
+"""
+Doublure locale de Discord (HTTP et interactions) pour les bancs d'essai
+
+Chaque appel à l'API passe par FakeHTTP, qui le compte par route, simule
+la latence réseau et peut répondre 429 : comme discord.py, la doublure
+patiente alors pendant retry_after puis renvoie la requête.
+
+Les appels du bot sont aussi limités par bucket (route + paramètres
+majeurs) : la doublure tient l'état de chaque bucket avec le Ratelimit de
+discord.py, mis à jour par des en-têtes X-RateLimit simulés, comme le fait
+HTTPClient.
+
+Comme dans discord.py, les appels du bot passent par FakeHTTP.request (que
+ApiScheduler.install peut envelopper), tandis que les réponses aux
+interactions passent par le webhook de l'interaction (FakeHTTP.webhook_request).
+
+Les objets imitent uniquement ce que le bot utilise réellement (salon,
+message, membre, serveur, interaction) : ils ne remplacent pas discord.py,
+qui doit être installé.
+"""
+
+import asyncio
+import itertools
+import random
+import time
+from types import SimpleNamespace
+
+import discord
+from discord.http import Ratelimit
+
+# Générateur d'IDs (format snowflake approximatif, croissant)
+_ids = itertools.count(1_100_000_000_000_000_000)
+
+
+def next_id() -> int:
+    """Retourne un nouvel ID unique"""
+    return next(_ids)
+
+
+class FakeRoute:
+    """Route de l'API (méthode, chemin et paramètres majeurs, comme discord.http.Route)"""
+
+    def __init__(self, method: str, path: str, *, channel_id: int = None, guild_id: int = None):
+        self.method = method
+        self.path = path
+        self.major_parameters = "+".join(str(value) for value in (channel_id, guild_id) if value is not None)
+
+    @property
+    def key(self) -> str:
+        return f"{self.method} {self.path}"
+
+    def __str__(self) -> str:
+        return self.key
+
+
+class FakeHTTP:
+    """
+    Couche HTTP simulée
+
+    Args:
+        latency_ms: Latence moyenne d'un appel
+        jitter_ms: Variation aléatoire de la latence (+/-)
+        rate_limit_ratio: Probabilité qu'un appel reçoive une réponse 429
+        retry_after_ms: Attente imposée par une réponse 429
+        bucket_limit: Appels autorisés par bucket sur une fenêtre
+        bucket_reset_ms: Durée de la fenêtre d'un bucket
+    """
+
+    def __init__(self, latency_ms: float = 80, jitter_ms: float = 40,
+                 rate_limit_ratio: float = 0.0, retry_after_ms: float = 500,
+                 bucket_limit: int = 5, bucket_reset_ms: float = 5000, seed=None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.rate_limit_ratio = rate_limit_ratio
+        self.retry_after_ms = retry_after_ms
+        self.bucket_limit = bucket_limit
+        self.bucket_reset_ms = bucket_reset_ms
+        self._random = random.Random(seed)
+
+        self.calls = {}        # Route -> nombre d'appels (429 compris)
+        self.rate_limited = {}  # Route -> nombre de réponses 429
+
+        # Mêmes attributs que HTTPClient (lus par ApiScheduler)
+        self._bucket_hashes = {}
+        self._buckets = {}   # Clé de bucket -> Ratelimit de discord.py
+        self._windows = {}   # Clé de bucket -> (début de la fenêtre, appels)
+
+    def reset(self):
+        """Remet les compteurs à zéro"""
+        self.calls.clear()
+        self.rate_limited.clear()
+
+    def total_calls(self) -> int:
+        """Nombre total d'appels depuis la dernière remise à zéro"""
+        return sum(self.calls.values())
+
+    async def request(self, route: FakeRoute):
+        """Appel du bot à l'API (HTTPClient.request), limité par bucket comme dans discord.py"""
+        key = f"{route.key}:{route.major_parameters}"
+        ratelimit = self._buckets.get(key)
+        if ratelimit is None:
+            ratelimit = self._buckets[key] = Ratelimit(None)
+        async with ratelimit:
+            await self.webhook_request(str(route))
+            ratelimit.update(SimpleNamespace(headers=self._ratelimit_headers(key)))
+
+    def _ratelimit_headers(self, key: str) -> dict:
+        """En-têtes X-RateLimit de la réponse (fenêtre fixe par bucket)"""
+        now = time.monotonic()
+        reset = self.bucket_reset_ms / 1000
+        start, used = self._windows.get(key, (now, 0))
+        if now >= start + reset:
+            start, used = now, 0
+        used += 1
+        self._windows[key] = (start, used)
+        return {
+            'X-Ratelimit-Limit': str(self.bucket_limit),
+            'X-Ratelimit-Remaining': str(max(self.bucket_limit - used, 0)),
+            'X-Ratelimit-Reset-After': str(start + reset - now),
+        }
+
+    async def webhook_request(self, route: str):
+        """Simule un appel à l'API (latence, puis 429 éventuel et nouvel essai)"""
+        while True:
+            self.calls[route] = self.calls.get(route, 0) + 1
+            delay = self.latency_ms + self._random.uniform(-self.jitter_ms, self.jitter_ms)
+            await asyncio.sleep(max(delay, 0) / 1000)
+
+            if self._random.random() >= self.rate_limit_ratio:
+                return
+            self.rate_limited[route] = self.rate_limited.get(route, 0) + 1
+            await asyncio.sleep(self.retry_after_ms / 1000)
+
+    # Points d'entrée de bas niveau utilisés par le bot (bot.http)
+
+    async def delete_message(self, channel_id: int, message_id: int, *, reason=None):
+        await self.request(FakeRoute("DELETE", "/channels/{channel_id}/messages/{message_id}", channel_id=channel_id))
+
+    async def delete_messages(self, channel_id: int, message_ids, *, reason=None):
+        await self.request(FakeRoute("POST", "/channels/{channel_id}/messages/bulk-delete", channel_id=channel_id))
+
+
+class FakeRole:
+    """Rôle d'un serveur"""
+
+    def __init__(self, guild, name: str):
+        self.id = next_id()
+        self.guild = guild
+        self.name = name
+
+
+class FakeMember:
+    """Membre d'un serveur"""
+
+    def __init__(self, guild, http: FakeHTTP, user_id: int = None):
+        self.id = user_id or next_id()
+        self.guild = guild
+        self.name = f"joueur-{self.id % 100000}"
+        self.mention = f"<@{self.id}>"
+        self.display_avatar = SimpleNamespace(url="https://cdn.example.invalid/avatar.png")
+        self.roles = []
+        self._http = http
+
+    def get_role(self, role_id: int):
+        return discord.utils.get(self.roles, id=role_id)
+
+    async def add_roles(self, *roles):
+        for role in roles:
+            await self._http.request(FakeRoute("PUT", "/guilds/{guild_id}/members/{user_id}/roles/{role_id}",
+                                               guild_id=self.guild.id))
+            self.roles.append(role)
+
+
+class FakeMessage:
+    """Message envoyé dans un salon (avec sa vue éventuelle)"""
+
+    def __init__(self, channel, http: FakeHTTP, view=None):
+        self.id = next_id()
+        self.channel = channel
+        self.view = view
+        self.deleted = False
+        self._http = http
+
+    async def delete(self):
+        await self._http.request(FakeRoute("DELETE", "/channels/{channel_id}/messages/{message_id}",
+                                           channel_id=self.channel.id))
+        if self.deleted:
+            raise discord.NotFound(SimpleNamespace(status=404, reason="Not Found"), "Unknown Message")
+        self.deleted = True
+
+
+class FakeChannel:
+    """Salon textuel"""
+
+    def __init__(self, guild, http: FakeHTTP):
+        self.id = next_id()
+        self.guild = guild
+        self.mention = f"<#{self.id}>"
+        self.messages = []
+        self._http = http
+
+    async def send(self, content=None, *, embed=None, embeds=None, view=None):
+        await self._http.request(FakeRoute("POST", "/channels/{channel_id}/messages", channel_id=self.id))
+        message = FakeMessage(self, self._http, view=view)
+        self.messages.append(message)
+        return message
+
+
+class FakeGuild:
+    """Serveur avec ses salons, rôles et membres"""
+
+    def __init__(self, http: FakeHTTP):
+        self.id = next_id()
+        self.roles = []
+        self.channels = {}
+        self.members = {}
+        self._http = http
+
+    def add_channel(self) -> FakeChannel:
+        channel = FakeChannel(self, self._http)
+        self.channels[channel.id] = channel
+        return channel
+
+    def add_member(self) -> FakeMember:
+        member = FakeMember(self, self._http)
+        self.members[member.id] = member
+        return member
+
+    def get_channel(self, channel_id: int):
+        return self.channels.get(channel_id)
+
+    def get_member(self, user_id: int):
+        return self.members.get(user_id)
+
+    def get_role(self, role_id: int):
+        return discord.utils.get(self.roles, id=role_id)
+
+    async def fetch_member(self, user_id: int):
+        await self._http.request(FakeRoute("GET", "/guilds/{guild_id}/members/{user_id}", guild_id=self.id))
+        return self.members[user_id]
+
+    async def create_role(self, *, name: str, **kwargs):
+        await self._http.request(FakeRoute("POST", "/guilds/{guild_id}/roles", guild_id=self.id))
+        role = FakeRole(self, name)
+        # Comme discord.py : le rôle n'arrive dans guild.roles qu'avec
+        # l'événement GUILD_ROLE_CREATE, un peu après la réponse
+        asyncio.get_running_loop().call_later(self._http.latency_ms / 1000, self.roles.append, role)
+        return role
+
+
+class FakeInteractionResponse:
+    """Réponse initiale d'une interaction (une seule autorisée, comme sur Discord)"""
+
+    def __init__(self, interaction):
+        self._interaction = interaction
+        self._responded = False
+        self.deferred = False
+
+    def is_done(self) -> bool:
+        return self._responded
+
+    async def _respond(self):
+        if self._responded:
+            raise discord.InteractionResponded(self._interaction)
+        self._responded = True
+        await self._interaction._http.webhook_request("POST /interactions/{interaction_id}/{token}/callback")
+        self._interaction.acked_at = time.perf_counter()
+
+    async def send_message(self, content=None, *, embed=None, ephemeral=False, **kwargs):
+        await self._respond()
+        self._interaction._finish()
+
+    async def defer(self, *, thinking=False, ephemeral=False):
+        self.deferred = True
+        await self._respond()
+
+
+class FakeFollowup:
+    """Messages de suivi (webhook de l'interaction)"""
+
+    def __init__(self, interaction):
+        self._interaction = interaction
+
+    async def send(self, content=None, *, embed=None, ephemeral=False, wait=False, **kwargs):
+        await self._interaction._http.webhook_request("POST /webhooks/{application_id}/{token}")
+        self._interaction._finish()
+        if wait:
+            return FakeMessage(self._interaction.channel, self._interaction._http)
+
+
+class FakeInteraction:
+    """
+    Clic sur le bouton d'un message
+
+    Attributs mesurés (horloge time.perf_counter) :
+        clicked_at: Instant du clic
+        acked_at: Instant de la première réponse (accusé de réception)
+        finished_at: Instant du message final (refus ou résultat du tirage)
+    """
+
+    def __init__(self, message: FakeMessage, user: FakeMember, http: FakeHTTP, client=None):
+        self.id = next_id()
+        self.client = client
+        self.message = message
+        self.user = user
+        self.guild = message.channel.guild
+        self.guild_id = self.guild.id
+        self.channel = message.channel
+        self.channel_id = message.channel.id
+        self.created_at = discord.utils.utcnow()
+        self.response = FakeInteractionResponse(self)
+        self.followup = FakeFollowup(self)
+        self.clicked_at = time.perf_counter()
+        self.acked_at = None
+        self.finished_at = None
+        self.finished = asyncio.Event()
+        self._http = http
+
+    def _finish(self):
+        self.finished_at = time.perf_counter()
+        self.finished.set()
+
+    async def delete_original_response(self):
+        await self._http.webhook_request("DELETE /webhooks/{application_id}/{token}/messages/@original")
+
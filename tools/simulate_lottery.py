@@ -0,0 +1,184 @@
+"""
+Simulateur de campagnes de cadeaux (hors ligne)
+
+Reproduit l'ordre de décision de LotteryManager.run_lottery :
+  1. si le joueur a déjà le rôle ET le livre, il ne gagne rien ;
+  2. tirage du livre (s'il ne l'a pas et qu'il reste du stock) ;
+  3. sinon tirage du rôle (s'il ne l'a pas et qu'il reste du stock) ;
+  4. sinon fun fact.
+
+Toutes les campagnes avancent en parallèle (un tableau NumPy par variable
+d'état), ce qui permet de simuler des millions de tirages en quelques
+secondes.
+
+Usage (depuis la racine du projet) :
+    python -m tools.simulate_lottery --campaigns 20000 --players 300
+"""
+
+import argparse
+import sys
+import time
+
+try:
+    import numpy as np
+except ImportError:
+    print("❌ Ce simulateur nécessite NumPy : pip install numpy")
+    sys.exit(1)
+
+import modules.config as config
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Arguments de la ligne de commande (valeurs par défaut : modules/config.py)"""
+    parser = argparse.ArgumentParser(description="Simule des campagnes de cadeaux de Noël")
+    parser.add_argument("--campaigns", type=int, default=10000, help="Nombre de campagnes simulées")
+    parser.add_argument("--players", type=int, default=200, help="Nombre de joueurs actifs")
+    parser.add_argument("--gifts", type=int, default=2000, help="Nombre maximal de cadeaux par campagne")
+    parser.add_argument("--claim-rate", type=float, default=1.0, help="Probabilité qu'un cadeau soit récupéré avant d'expirer")
+    parser.add_argument("--activity-skew", type=float, default=0.0,
+                        help="Exposant de Zipf de l'activité des joueurs (0 = tous aussi actifs)")
+    parser.add_argument("--role-probability", type=float, default=config.ROLE_PROBABILITY)
+    parser.add_argument("--book-probability", type=float, default=config.BOOK_PROBABILITY)
+    parser.add_argument("--max-roles", type=int, default=config.MAX_ROLES, help="-1 = illimité")
+    parser.add_argument("--max-books", type=int, default=config.MAX_BOOKS, help="-1 = illimité")
+    parser.add_argument("--min-interval", type=int, default=config.MIN_SPAWN_INTERVAL, help="Secondes")
+    parser.add_argument("--max-interval", type=int, default=config.MAX_SPAWN_INTERVAL, help="Secondes")
+    parser.add_argument("--seed", type=int, default=None)
+    return parser
+
+
+def simulate(args):
+    """
+    Simule les campagnes
+
+    Returns:
+        Dictionnaire : nombre de tirages, instants d'épuisement des
+        stocks (secondes depuis le début) et gains par joueur
+    """
+    rng = np.random.default_rng(args.seed)
+    n, players = args.campaigns, args.players
+    rows = np.arange(n)
+
+    # Instant de l'apparition courante : la cadence suit exactement [min, max]
+    now = np.zeros(n, dtype=np.int64)
+
+    # Poids d'activité des joueurs (loi de Zipf optionnelle)
+    weights = 1.0 / np.arange(1, players + 1) ** args.activity_skew
+    weights /= weights.sum()
+
+    has_role = np.zeros((n, players), dtype=bool)
+    has_book = np.zeros((n, players), dtype=bool)
+    roles_given = np.zeros(n, dtype=np.int64)
+    books_given = np.zeros(n, dtype=np.int64)
+    role_wins = np.zeros((n, players), dtype=np.int32)
+    book_wins = np.zeros((n, players), dtype=np.int32)
+
+    # Instant d'épuisement (-1 = pas encore épuisé)
+    roles_depleted_at = np.full(n, -1, dtype=np.int64)
+    books_depleted_at = np.full(n, -1, dtype=np.int64)
+
+    unlimited_roles = args.max_roles == -1
+    unlimited_books = args.max_books == -1
+
+    gifts_simulated = 0
+    for _ in range(args.gifts):
+        now += rng.integers(args.min_interval, args.max_interval + 1, size=n)
+        gifts_simulated += 1
+        claimed = rng.random(n) < args.claim_rate
+        player = rng.choice(players, size=n, p=weights)
+
+        player_has_role = has_role[rows, player]
+        player_has_book = has_book[rows, player]
+
+        # 1-2. Tirage du livre (prioritaire)
+        books_left = unlimited_books | (books_given < args.max_books)
+        won_book = claimed & ~player_has_book & books_left & (rng.random(n) < args.book_probability)
+
+        # 3. Tirage du rôle, seulement si le livre n'a pas été gagné
+        roles_left = unlimited_roles | (roles_given < args.max_roles)
+        won_role = claimed & ~won_book & ~player_has_role & roles_left & (rng.random(n) < args.role_probability)
+
+        has_book[rows[won_book], player[won_book]] = True
+        has_role[rows[won_role], player[won_role]] = True
+        book_wins[rows[won_book], player[won_book]] += 1
+        role_wins[rows[won_role], player[won_role]] += 1
+        books_given += won_book
+        roles_given += won_role
+
+        # Noter l'instant d'épuisement des stocks
+        if not unlimited_roles:
+            just_depleted = (roles_depleted_at < 0) & (roles_given >= args.max_roles)
+            roles_depleted_at[just_depleted] = now[just_depleted]
+        if not unlimited_books:
+            just_depleted = (books_depleted_at < 0) & (books_given >= args.max_books)
+            books_depleted_at[just_depleted] = now[just_depleted]
+
+        # Arrêt anticipé quand tous les stocks de toutes les campagnes sont épuisés
+        if (not unlimited_roles and not unlimited_books
+                and (roles_depleted_at >= 0).all() and (books_depleted_at >= 0).all()):
+            break
+
+    return {
+        'draws': n * gifts_simulated,
+        'roles_depleted_at': roles_depleted_at,
+        'books_depleted_at': books_depleted_at,
+        'wins_per_player': role_wins + book_wins,
+    }
+
+
+def format_duration(seconds: float) -> str:
+    """Affiche une durée en heures/minutes"""
+    hours, rest = divmod(int(seconds), 3600)
+    return f"{hours}h{rest // 60:02d}"
+
+
+def report_depletion(label: str, depleted_at, limit: int):
+    """Affiche la distribution du temps avant épuisement d'un stock"""
+    if limit == -1:
+        print(f"{label} : stock illimité")
+        return
+    done = depleted_at[depleted_at >= 0]
+    ratio = len(done) / len(depleted_at)
+    print(f"{label} : épuisé dans {ratio:.1%} des campagnes")
+    if len(done):
+        p5, p50, p95 = np.percentile(done, [5, 50, 95])
+        print(f"  temps avant épuisement : p5 {format_duration(p5)} | "
+              f"médiane {format_duration(p50)} | p95 {format_duration(p95)}")
+
+
+def main(argv=None):
+    """Point d'entrée du simulateur"""
+    args = build_parser().parse_args(argv)
+    if args.min_interval < 1 or args.max_interval < args.min_interval:
+        print("❌ Intervalles invalides (1 <= min <= max)")
+        return 1
+
+    start = time.perf_counter()
+    result = simulate(args)
+    elapsed = time.perf_counter() - start
+
+    draws = result['draws']
+    print(f"🎲 {args.campaigns} campagnes, {draws:,} tirages simulés en {elapsed:.2f}s")
+    print(f"   Rôle {args.role_probability:.1%} (stock {args.max_roles}), "
+          f"livre {args.book_probability:.1%} (stock {args.max_books}), "
+          f"intervalle {args.min_interval}-{args.max_interval}s, {args.players} joueurs")
+    print()
+
+    report_depletion("🎅 Rôles", result['roles_depleted_at'], args.max_roles)
+    report_depletion("📚 Livres", result['books_depleted_at'], args.max_books)
+    print()
+
+    wins = result['wins_per_player']
+    distribution = np.bincount(wins.ravel(), minlength=3)
+    total = distribution.sum()
+    print("🏆 Gains par joueur (toutes campagnes) :")
+    for count, players in enumerate(distribution):
+        print(f"  {count} gain(s) : {players / total:.2%} des joueurs")
+    winners = (wins > 0).sum(axis=1)
+    print(f"  gagnants distincts par campagne : médiane {np.median(winners):.0f}, "
+          f"p95 {np.percentile(winners, 95):.0f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())